@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+"""
+| Copyright (C) 2020 Johannes Schlatow
+| TU Braunschweig, Germany
+| All rights reserved.
+| See LICENSE file for copyright and license details.
+
+:Authors:
+         - Johannes Schlatow
+
+Description
+-----------
+
+Analyses all resources of a (multi-resource) GraphML file as a single system.
+"""
+
+from pycpa import options
+from pycpa import analysis
+from taskchain import model as tc_model
+from taskchain import schedulers as tc_schedulers
+from taskchain import parser
+
+options.parser.add_argument('file', type=str,
+        help="GraphML file containing the task-chain models.")
+options.parser.add_argument('--single_tasks', action='store_true',
+        help="Decompose into single tasks.")
+options.parser.add_argument('--scheduler', type=str, default='SPPSchedulerSegments',
+        help="Scheduler class to be used for the analysis.")
+options.parser.add_argument('--resource_scheduler', type=str, nargs='*', default=list(),
+        help="Scheduler class for particular resources given as RESOURCE=SCHEDULER.")
+
+def print_results(task_results, details=True):
+    for t in task_results:
+        print("%s: wcrt=%d" % (t, task_results[t].wcrt))
+        if details:
+            print("    b_wcrt=%s" % (task_results[t].b_wcrt_str()))
+
+if __name__ == "__main__":
+    # init pycpa and trigger command line parsing
+    options.init_pycpa()
+
+    p = parser.Graphml()
+    models = p.models_from_file(options.get_opt('file'))
+    for m in models.values():
+        assert(m.check())
+
+    schedulers = dict([(name, getattr(tc_schedulers, options.get_opt('scheduler'))) for name in models.keys()])
+    for arg in options.get_opt('resource_scheduler'):
+        name, sched = arg.split('=')
+        schedulers[name] = getattr(tc_schedulers, sched)
+
+    s = tc_model.build_system(models.values(), schedulers, single=options.get_opt('single_tasks'))
+
+    print("Performing taskchain analysis of %d resources" % len(models))
+    print_results(analysis.analyze_system(s))
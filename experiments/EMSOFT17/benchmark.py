@@ -89,7 +89,11 @@ if __name__ == "__main__":
                     if not resume:
                         resume = True
 
-                    analyze_with_increasing_load(g, m)
+                    try:
+                        analyze_with_increasing_load(g, m)
+                    finally:
+                        # write pending rows even if the analysis is aborted
+                        g.close_output()
 
 #    m.write_dot(options.get_opt('output'))
 #    g.random_wcet(m, load=0.6, rel_jitter=0.1)
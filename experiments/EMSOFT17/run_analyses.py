@@ -21,8 +21,8 @@ from pycpa import path_analysis
 from taskchain import model as tc_model
 from taskchain import schedulers as tc_schedulers
 from taskchain import parser 
+from taskchain import resultsink
 
-import csv
 import itertools
 
 options.parser.add_argument('--priorities', type=int, nargs='*',
@@ -58,8 +58,13 @@ options.parser.add_argument('--print_differing', action='store_true',
         help="Print details of differing WCRT results.")
 options.parser.add_argument('--calculate_difference', action='store_true',
         help="Calculate difference of results (only if two experiments are executed).")
+options.parser.add_argument('--dot', type=str, default=None,
+        help="Write the model as DOT graph to the given file.")
+
+sink = None
 
 def write_header(contexts, experiment_names):
+    global sink
     if options.get_opt('output'):
         header = ["Chain"]
         for c in contexts:
@@ -70,19 +75,8 @@ def write_header(contexts, experiment_names):
             assert(len(experiment_names) == 2)
             header.append('diff')
 
-        if options.get_opt('resume'):
-            # read file header
-            with open(options.get_opt('output'), 'r') as csvfile:
-                reader = csv.DictReader(csvfile, delimiter='\t')
-
-                # assert that headers are present and in correct order
-                assert(len(reader.fieldnames) == len(header))
-                for i in range(len(reader.fieldnames)):
-                    assert(reader.fieldnames[i] == header[i])
-        else:
-            with open(options.get_opt('output'), "w") as csvfile:
-                writer = csv.writer(csvfile, delimiter='\t')
-                writer.writerow(header)
+        # when resuming, the sink asserts that the existing header matches
+        sink = resultsink.ResultSink(options.get_opt('output'), header, resume=options.get_opt('resume'))
 
 def write_results(contexts, experiments, paths):
     if options.get_opt('print'):
@@ -92,44 +86,38 @@ def write_results(contexts, experiments, paths):
         for path in paths:
             print("%s\t%s" % (path.name, "\t".join([str(e.results[path]) for e in experiments])))
 
-    if options.get_opt('output'):
-        with open(options.get_opt('output'), "a") as csvfile:
-            writer = csv.writer(csvfile, delimiter='\t')
-
-            prio_list = list()
-            for c in contexts:
-                prio_list += [str(c.priority)]
+    if sink is not None:
+        prio_list = list()
+        for c in contexts:
+            prio_list += [str(c.priority)]
 
-            for path in paths:
-                row = [path.name] + prio_list
-                for e in experiments:
-                    row += [e.results[path]]
+        for path in paths:
+            row = [path.name] + prio_list
+            for e in experiments:
+                row += [e.results[path]]
 
-                if options.get_opt('calculate_difference'):
-                    assert(len(experiments) == 2)
-                    row.append(experiments[0].results[path] - experiments[1].results[path])
+            if options.get_opt('calculate_difference'):
+                assert(len(experiments) == 2)
+                row.append(experiments[0].results[path] - experiments[1].results[path])
 
-                writer.writerow(row)
+            sink.write(row)
 
 def parse_existing_results(contexts, experiments):
     if options.get_opt('output'):
         analysed_paths = set()
         analysed_priorities = list()
 
-        with open(options.get_opt('output'), 'r') as csvfile:
-            reader = csv.DictReader(csvfile, delimiter='\t')
-
-            last_prio_list = list()
-            for row in reader:
-                prio_list = list()
-                for c in contexts:
-                    prio_list += [row[c.name]]
+        last_prio_list = list()
+        for row in resultsink.read_rows(options.get_opt('output')):
+            prio_list = list()
+            for c in contexts:
+                prio_list += [row[c.name]]
 
-                analysed_paths.add(row['Chain'])
-                if last_prio_list != prio_list:
-                    analysed_priorities.append(prio_list)
+            analysed_paths.add(row['Chain'])
+            if last_prio_list != prio_list:
+                analysed_priorities.append(prio_list)
 
-                last_prio_list = prio_list
+            last_prio_list = prio_list
 
         return analysed_paths, analysed_priorities
     else:
@@ -220,7 +208,8 @@ if __name__ == "__main__":
     p = parser.Graphml()
     m = p.model_from_file(options.get_opt('input'))
     assert(m.check())
-    tc_model.ResourceModel.write_dot([m], 'system.dot')
+    if options.get_opt('dot'):
+        tc_model.ResourceModel.write_dot([m], options.get_opt('dot'))
 
     if options.get_opt('build_chains'):
         # create paths
@@ -232,7 +221,7 @@ if __name__ == "__main__":
         # perform a DFS
         paths = list()
         for r in roots:
-            for p in m.paths(r):
+            for p in m.iter_paths(r):
                 paths.append(model.Path(p[-1].name, p))
     else:
         paths = [model.Path(t.name, [t]) for t in m.tasks]
@@ -296,35 +285,51 @@ if __name__ == "__main__":
     num_priorities = len(m.sched_ctxs)
     write_header(m.sched_ctxs, [e.name for e in experiments])
 
-    if options.get_opt('resume'):
-        # read analysed priorities and paths from existing output file
-        analysed_paths, analysed_priorities = parse_existing_results(m.sched_ctxs, experiments)
+    try:
+        if options.get_opt('resume'):
+            # read analysed priorities and paths from existing output file
+            analysed_paths, analysed_priorities = parse_existing_results(m.sched_ctxs, experiments)
+
+            # check that we analyse the same paths
+            if analysed_paths is not None:
+                assert(len(analysed_paths) == len(paths))
+                for p in paths:
+                    assert(p.name in analysed_paths)
+        else:
+            analysed_priorities = None
 
-        # check that we analyse the same paths
-        if analysed_paths is not None:
-            assert(len(analysed_paths) == len(paths))
-            for p in paths:
-                assert(p.name in analysed_paths)
-    else:
-        analysed_priorities = None
-
-    if options.get_opt('all_priorities') or len(options.get_opt('priorities')) == 0:
-
-        for priorities in itertools.permutations(range(1, num_priorities+1)):
-            if analysed_priorities is not None:
-                skip = False
-                for analysed in analysed_priorities:
-                    match = True
-                    for i in range(len(analysed)):
-                        if int(analysed[i]) != priorities[i]:
-                            match = False
-
-                    if match:
-                        skip = True
-                if skip:
-                    print("Skipping %s" % str(priorities))
-                    continue
+        if options.get_opt('all_priorities') or len(options.get_opt('priorities')) == 0:
+
+            for priorities in itertools.permutations(range(1, num_priorities+1)):
+                if analysed_priorities is not None:
+                    skip = False
+                    for analysed in analysed_priorities:
+                        match = True
+                        for i in range(len(analysed)):
+                            if int(analysed[i]) != priorities[i]:
+                                match = False
+
+                        if match:
+                            skip = True
+                    if skip:
+                        print("Skipping %s" % str(priorities))
+                        continue
+
+                for e in experiments:
+                    try:
+                        e.run(priorities, paths)
+                    except analysis.NotSchedulableException as ex:
+                        e.clear_results(paths)
+                        print(ex)
+
+                write_results(m.sched_ctxs, experiments, paths)
+                print_differing([e for e in experiments if e.task_results is not None], m.tasks)
 
+            # TODO optionally also use itertools.product() with repeat=n and n-1, n-2, ... priorities
+
+        else:
+            priorities = options.get_opt('priorities')
+            assert(not options.get_opt('all_priorities'))
             for e in experiments:
                 try:
                     e.run(priorities, paths)
@@ -333,20 +338,9 @@ if __name__ == "__main__":
                     print(ex)
 
             write_results(m.sched_ctxs, experiments, paths)
-            print_differing([e for e in experiments if e.task_results is not None], m.tasks)
-
-        # TODO optionally also use itertools.product() with repeat=n and n-1, n-2, ... priorities
-
-    else:
-        priorities = options.get_opt('priorities')
-        assert(not options.get_opt('all_priorities'))
-        for e in experiments:
-            try:
-                e.run(priorities, paths)
-            except analysis.NotSchedulableException as ex:
-                e.clear_results(paths)
-                print(ex)
-
-        write_results(m.sched_ctxs, experiments, paths)
-        print_differing(experiments, m.tasks)
+            print_differing(experiments, m.tasks)
+    finally:
+        # write pending rows even if the analysis is aborted
+        if sink is not None:
+            sink.close()
 
@@ -18,6 +18,8 @@ import os
 import pandas as pd
 from pandas.api.types import CategoricalDtype
 
+from taskchain import resultsink
+
 class LatencyData(object):
     def __init__(self, csvfiles=None, folder=None):
         assert csvfiles or folder
@@ -39,13 +41,15 @@ class LatencyData(object):
                 for x, y, files in os.walk(folder+'/'+d):
                     if 'latency.csv' in files:
                         csvfiles.append('%s/%s/latency.csv' % (folder, d))
+                    elif 'latency.parquet' in y:
+                        csvfiles.append('%s/%s/latency.parquet' % (folder, d))
 
         return csvfiles
 
     def parse_and_combine(self):
         dataframes = []
         for csvfile in self.csvfiles:
-            dataframes.append(pd.read_csv(csvfile, sep='\t', index_col=False))
+            dataframes.append(resultsink.read_frame(csvfile, index_col=False))
 
         self.dataframe = None
         for df in dataframes:
@@ -137,13 +141,15 @@ class SchedulabilityData(object):
                 for x, y, files in os.walk(folder+'/'+d):
                     if 'schedulability.csv' in files:
                         csvfiles.append('%s/%s/schedulability.csv' % (folder, d))
+                    elif 'schedulability.parquet' in y:
+                        csvfiles.append('%s/%s/schedulability.parquet' % (folder, d))
 
         return csvfiles
 
     def parse_and_combine(self):
         dataframes = []
         for csvfile in self.csvfiles:
-            dataframes.append(pd.read_csv(csvfile, sep='\t', index_col=False))
+            dataframes.append(resultsink.read_frame(csvfile, index_col=False))
 
         self.dataframe = None
         for df in dataframes:
@@ -17,6 +17,8 @@ import csv
 import os
 import pandas as pd
 
+from taskchain import resultsink
+
 class Data(object):
     def __init__(self, csvfiles=None, folder=None):
         assert csvfiles or folder
@@ -39,21 +41,21 @@ class Data(object):
                 for x, y, files in os.walk(folder+'/'+d):
                     if 'results.csv' in files:
                         csvfiles.append('%s/%s/results.csv' % (folder, d))
+                    elif 'results.parquet' in y:
+                        csvfiles.append('%s/%s/results.parquet' % (folder, d))
 
         return csvfiles
 
     def parse_and_combine(self):
-        # peek into the first file and detect context names
-        with open(list(self.csvfiles)[0]) as csvfile:
-            reader = csv.reader(csvfile, delimiter='\t')
-            for row in reader:
-                self.multiindex = row[:-1]
-                self.contexts   = row[1:-1]
-                break
-
         dataframes = []
         for csvfile in self.csvfiles:
-            dataframes.append(pd.read_csv(csvfile, sep='\t', index_col=self.multiindex))
+            df = resultsink.read_frame(csvfile)
+            if self.multiindex is None:
+                # detect context names from the first file
+                self.multiindex = list(df.columns[:-1])
+                self.contexts   = list(df.columns[1:-1])
+
+            dataframes.append(df.set_index(self.multiindex))
 
         for df in dataframes:
             if self.dataframe is None:
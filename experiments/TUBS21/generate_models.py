@@ -29,6 +29,10 @@ options.parser.add_argument('--offset', type=int, default=0,
         help="start at id")
 options.parser.add_argument('--inherit', action='store_true',
         help="use priority inheritance")
+options.parser.add_argument('--dot', action='store_true',
+        help="also write a DOT graph for every model")
+options.parser.add_argument('--archive', type=str, default=None,
+        help="write models into a single archive (in outpath) instead of separate files")
 
 def write_header(filename):
     header = ["Index", "Length", "Number", "Nesting", "Sharing", "Branching", "Load", "Inherit"]
@@ -60,6 +64,12 @@ if __name__ == "__main__":
     write_header(outfile)
 
     index = 1 + options.get_opt('offset')
+
+    archive = None
+    if options.get_opt('archive'):
+        archive = parser.ModelArchive('%s/%s' % (options.get_opt('outpath'), options.get_opt('archive')),
+                                      mode='a' if options.get_opt('offset') else 'w')
+
     for length in [13, 9, 5]:
         for number in [2, 4, 8]:
             for nesting_depth in range(0, min(3, 1+int(math.floor(length/2)))):
@@ -83,6 +93,15 @@ if __name__ == "__main__":
                                 write_settings(filename=outfile, m=m, sharing_level=sharing_level, nesting_depth=nesting_depth,
                                         branching_level=branching_level, length=length, number=number,
                                         inherit=options.get_opt('inherit'), load=g.calculate_load(m))
-                                parser.Graphml.model_to_file(m, filename='%s/model-%s.graphml' %(options.get_opt('outpath'), m.name))
-                                model.ResourceModel.write_dot([m], filename='%s/model-%s.dot' %(options.get_opt('outpath'), m.name))
+                                if archive:
+                                    archive.add_model(m)
+                                    if options.get_opt('dot'):
+                                        archive.add_dot([m], 'model-%s.dot' % m.name)
+                                else:
+                                    parser.Graphml.model_to_file(m, filename='%s/model-%s.graphml' %(options.get_opt('outpath'), m.name))
+                                    if options.get_opt('dot'):
+                                        model.ResourceModel.write_dot([m], filename='%s/model-%s.dot' %(options.get_opt('outpath'), m.name))
                                 index += 1
+
+    if archive:
+        archive.close()
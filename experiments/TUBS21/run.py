@@ -21,8 +21,8 @@ from pycpa import path_analysis
 from taskchain import model as tc_model
 from taskchain import schedulers as tc_schedulers
 from taskchain import parser
+from taskchain import resultsink
 
-import csv
 import itertools
 
 options.parser.add_argument('file', type=str,
@@ -37,17 +37,20 @@ options.parser.add_argument('--name', type=str,
         help="Name of the analysis.")
 options.parser.add_argument('--print', action='store_true',
         help="Also print analysis results to stdout.")
+options.parser.add_argument('--dot', type=str, default=None,
+        help="Write the model as DOT graph to the given file.")
+
+sink = None
 
 def write_header(contexts, name):
+    global sink
     if options.get_opt('outfile'):
         header = ["Path"]
         for c in contexts:
             header += [c.name]
         header += [name]
 
-        with open(options.get_opt('outfile'), "w") as csvfile:
-            writer = csv.writer(csvfile, delimiter='\t')
-            writer.writerow(header)
+        sink = resultsink.ResultSink(options.get_opt('outfile'), header)
 
 def write_results(contexts, results):
     if options.get_opt('print'):
@@ -56,19 +59,16 @@ def write_results(contexts, results):
         for path, result in results.items():
             print("%s\t%s" % (path.name, result))
 
-    if options.get_opt('outfile'):
-        with open(options.get_opt('outfile'), "a") as csvfile:
-            writer = csv.writer(csvfile, delimiter='\t')
-
-            prio_list = list()
-            for c in contexts:
-                prio_list += [str(c.priority)]
+    if sink is not None:
+        prio_list = list()
+        for c in contexts:
+            prio_list += [str(c.priority)]
 
-            for path, result in results.items():
-                row = [path.name] + prio_list
-                row += [result]
+        for path, result in results.items():
+            row = [path.name] + prio_list
+            row += [result]
 
-                writer.writerow(row)
+            sink.write(row)
 
 class Experiment(object):
     def __init__(self, scheduler, resource_model, build_chains=False):
@@ -129,7 +129,8 @@ if __name__ == "__main__":
     p = parser.Graphml()
     m = p.model_from_file(options.get_opt('file'))
     assert(m.check())
-    tc_model.ResourceModel.write_dot([m], 'system.dot')
+    if options.get_opt('dot'):
+        tc_model.ResourceModel.write_dot([m], options.get_opt('dot'))
 
     schedname =  options.get_opt('scheduler')
     print("Performing taskchain analysis with %s" % schedname)
@@ -144,11 +145,16 @@ if __name__ == "__main__":
     num_priorities = len(m.sched_ctxs)
     write_header(m.sched_ctxs, options.get_opt('name'))
 
-    for priorities in itertools.permutations(range(1, num_priorities+1)):
-        try:
-            e.run(priorities)
-        except analysis.NotSchedulableException as ex:
-            e.clear_results()
-            print(ex)
-
-        write_results(m.sched_ctxs, e.results)
+    try:
+        for priorities in itertools.permutations(range(1, num_priorities+1)):
+            try:
+                e.run(priorities)
+            except analysis.NotSchedulableException as ex:
+                e.clear_results()
+                print(ex)
+
+            write_results(m.sched_ctxs, e.results)
+    finally:
+        # write pending rows even if the analysis is aborted
+        if sink is not None:
+            sink.close()
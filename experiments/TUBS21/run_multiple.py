@@ -21,6 +21,7 @@ from pycpa import path_analysis
 from taskchain import model as tc_model
 from taskchain import schedulers as tc_schedulers
 from taskchain import parser
+from taskchain import resultsink
 
 import csv
 import copy
@@ -34,12 +35,22 @@ options.parser.add_argument('--outpath', type=str, required=True,
         help="Output path for creating schedulability.csv and latency.csv.")
 options.parser.add_argument('--single_tasks', action='store_true',
         help="Decompose into single tasks.")
-options.parser.add_argument('--resume', type=int, default=0,
-        help="Start at given index.")
+options.parser.add_argument('--resume', action='store_true',
+        help="Continue a previous run, skipping the models whose results survived the last checkpoint.")
 options.parser.add_argument('--scheduler', type=str, default='SPPSchedulerSegments',
         help="Scheduler class to be used for the analysis.")
 options.parser.add_argument('--name', type=str,
         help="Name of the analysis.")
+options.parser.add_argument('--cache', action='store_true',
+        help="Cache parsed models next to the GraphML files.")
+options.parser.add_argument('--archive', type=str, default=None,
+        help="Read models from the given archive (in folder) instead of separate GraphML files.")
+options.parser.add_argument('--dot', type=str, default=None,
+        help="Write relaxed models as DOT graph to the given file.")
+options.parser.add_argument('--format', type=str, default='csv', choices=['csv', 'parquet'],
+        help="Format of the result files.")
+options.parser.add_argument('--loaders', type=int, default=None,
+        help="Number of processes for loading models (default: cpu count, 0: serial).")
 
 def parse_settings(filename):
     result = list()
@@ -51,56 +62,32 @@ def parse_settings(filename):
 
     return result
 
-class LatencyResults():
+class LatencyResults(resultsink.ResultSink):
     def __init__(self, filename, name, fieldnames, resume=False):
-        self.filename   = filename
-        self.name       = name
-        self.fieldnames = fieldnames
-        self.fieldnames += ['Path', self.name]
-
-        if not resume:
-            self.write_header()
-
-    def write_header(self):
-        with open(self.filename, "w") as csvfile:
-            writer = csv.writer(csvfile, delimiter='\t')
-            writer.writerow(self.fieldnames)
+        self.name = name
+        resultsink.ResultSink.__init__(self, filename, fieldnames + ['Path', self.name], resume=resume)
 
     def write_results(self, setting, results):
-        with open(self.filename, "a") as csvfile:
-            writer = csv.DictWriter(csvfile, delimiter='\t', fieldnames=self.fieldnames)
-            row = copy.copy(setting)
+        row = copy.copy(setting)
 
-            for path, result in results.items():
-                row['Path']    = path.name
-                row[self.name] = result
+        for path, result in results.items():
+            row['Path']    = path.name
+            row[self.name] = result
 
-            writer.writerow(row)
+        self.write(row)
 
 
-class SchedulabilityResults():
+class SchedulabilityResults(resultsink.ResultSink):
     def __init__(self, filename, name, fieldnames, resume=False):
-        self.filename   = filename
-        self.name       = name
-        self.fieldnames = fieldnames
-        self.fieldnames += [self.name, 'Time']
-
-        if not resume:
-            self.write_header()
-
-    def write_header(self):
-        with open(self.filename, "w") as csvfile:
-            writer = csv.writer(csvfile, delimiter='\t')
-            writer.writerow(self.fieldnames)
+        self.name = name
+        resultsink.ResultSink.__init__(self, filename, fieldnames + [self.name, 'Time'], resume=resume)
 
     def write_results(self, setting, result, time):
-        with open(self.filename, "a") as csvfile:
-            writer = csv.DictWriter(csvfile, delimiter='\t', fieldnames=self.fieldnames)
-            row = copy.copy(setting)
-            row[self.name] = result
-            row['Time'] = time
+        row = copy.copy(setting)
+        row[self.name] = result
+        row['Time'] = time
 
-            writer.writerow(row)
+        self.write(row)
 
 
 class Experiment(object):
@@ -138,7 +125,7 @@ class Experiment(object):
 
             # perform a DFS
             for r in roots:
-                for p in self.resource_model.paths(r):
+                for p in self.resource_model.iter_paths(r):
                     self.paths.append(model.Path(p[-1].name, p))
 
         # TODO do we need to check that chains reflect paths?
@@ -172,45 +159,65 @@ if __name__ == "__main__":
 
     resume = options.get_opt('resume')
 
-    p = parser.Graphml()
+    p = parser.Graphml(cache=options.get_opt('cache'))
 
     settings = parse_settings('%s/settings.csv' % options.get_opt('folder'))
     schedname =  options.get_opt('scheduler')
 
-    latres   = LatencyResults(filename='%s/latency.csv' % options.get_opt('outpath'),
+    ext = options.get_opt('format')
+    latres   = LatencyResults(filename='%s/latency.%s' % (options.get_opt('outpath'), ext),
                               name=options.get_opt('name'),
                               fieldnames=sorted(settings[0].keys()),
                               resume=resume)
-    schedres = SchedulabilityResults(filename='%s/schedulability.csv' % options.get_opt('outpath'),
+    schedres = SchedulabilityResults(filename='%s/schedulability.%s' % (options.get_opt('outpath'), ext),
                                      name=options.get_opt('name'),
                                      fieldnames=sorted(settings[0].keys()),
                                      resume=resume)
 
-    print("Start analysing %d models." % len(settings))
-    for s in settings:
-        if resume and int(s['Index']) < resume:
-            continue
-
-        m = p.model_from_file('%s/%s' % (options.get_opt('folder'), s['filename']))
-
-        if schedname.startswith('pycpa'):
-            sched = getattr(schedulers, schedname.split('.')[-1])
-        else:
-            sched = getattr(tc_schedulers, schedname)
-
-
-        relaxed = False
-        if schedname == 'SPPSchedulerSegmentsUniform' or schedname.startswith('pycpa'):
-            inserted = m.relax_model()
-            if inserted > 0:
-                relaxed = True
-                assert m.check()
-                tc_model.ResourceModel.write_dot([m], 'system.dot')
-
-        print("Performing taskchain analysis of %s%s with %s" % ('relaxed ' if relaxed else '', s['filename'], schedname))
-        e = Experiment(sched(), m, build_chains=not options.get_opt('single_tasks'))
-
-        res, analysistime = e.run()
-        schedres.write_results(s, res, analysistime)
-        if res == 'SCHED':
-            latres.write_results(s, e.results)
+    try:
+        print("Start analysing %d models." % len(settings))
+
+        # the sinks discard results written after their last checkpoint, hence the models to skip
+        #   are taken from the remaining rows rather than from the last index that was printed
+        sched_done = dict() # index -> schedulability result
+        lat_done   = set()
+        if resume:
+            for row in resultsink.read_rows(schedres.filename):
+                sched_done[str(row['Index'])] = row[schedres.name]
+            for row in resultsink.read_rows(latres.filename):
+                lat_done.add(str(row['Index']))
+
+            settings = [s for s in settings if s['Index'] not in sched_done or
+                                               (sched_done[s['Index']] == 'SCHED' and s['Index'] not in lat_done)]
+            print("Resuming with %d models." % len(settings))
+
+        for s, m in p.models_from_folder(options.get_opt('folder'), settings,
+                                         processes=options.get_opt('loaders'),
+                                         archive=options.get_opt('archive')):
+            if schedname.startswith('pycpa'):
+                sched = getattr(schedulers, schedname.split('.')[-1])
+            else:
+                sched = getattr(tc_schedulers, schedname)
+
+
+            relaxed = False
+            if schedname == 'SPPSchedulerSegmentsUniform' or schedname.startswith('pycpa'):
+                inserted = m.relax_model()
+                if inserted > 0:
+                    relaxed = True
+                    assert m.check()
+                    if options.get_opt('dot'):
+                        tc_model.ResourceModel.write_dot([m], options.get_opt('dot'))
+
+            print("Performing taskchain analysis of %s%s with %s" % ('relaxed ' if relaxed else '', s['filename'], schedname))
+            e = Experiment(sched(), m, build_chains=not options.get_opt('single_tasks'))
+
+            res, analysistime = e.run()
+            if s['Index'] not in sched_done:
+                schedres.write_results(s, res, analysistime)
+            if res == 'SCHED' and s['Index'] not in lat_done:
+                latres.write_results(s, e.results)
+    finally:
+        # write pending rows even if the analysis is aborted
+        latres.close()
+        schedres.close()
@@ -11,5 +11,7 @@ setup(
     url='https://github.com/IDA-TUBS/pycpa_taskchain',
     license='MIT',
     packages= ['taskchain'],
-    install_requires=['pycpa', 'networkx']
+    install_requires=['pycpa', 'networkx', 'numpy'],
+    extras_require={'msgpack' : ['msgpack'],
+                    'parquet' : ['pyarrow']}
 )
@@ -22,14 +22,13 @@ import logging
 import copy
 import warnings
 
-import csv
-
 from numpy import random
 
 from pycpa import options
 from pycpa import util
 from pycpa import model
 from . import model as tc_model
+from . import resultsink
 
 logger = logging.getLogger(__name__)
 
@@ -106,7 +105,7 @@ class Generator (object):
             paths = list()
             for t in m.tasks:
                 if len(m.predecessors(t)) == 0:
-                    paths += m.paths(t)
+                    paths.extend(m.iter_paths(t))
 
             random.shuffle(paths)
 
@@ -316,39 +315,26 @@ class Generator (object):
         return int(math.ceil(load * 100))
 
     def write_header(self, filename, resume=False):
-        self.output = filename
-
         header = ["Length", "Number", "Nesting", "Sharing", "Branching", "Load", "Inherit", "Schedulable", "MaxRecur"]
 
-        if resume:
-            # read file header
-            with open(filename, 'r') as csvfile:
-                reader = csv.DictReader(csvfile, delimiter='\t')
-
-                # assert that headers are present and in correct order
-                assert(len(reader.fieldnames) == len(header))
-                for i in range(len(reader.fieldnames)):
-                    assert(reader.fieldnames[i] == header[i])
-        else:
-            with open(filename, "w") as csvfile:
-                writer = csv.writer(csvfile, delimiter='\t')
-                writer.writerow(header)
+        # when resuming, the sink asserts that the existing header matches
+        self.output = resultsink.ResultSink(filename, header, resume=resume)
 
     def write_result(self, m, result, max_recur):
-        with open(self.output, "a") as csvfile:
-            writer = csv.writer(csvfile, delimiter='\t')
-
-            row = [self.length,
-                    self.number,
-                    self.nesting_depth,
-                    self.sharing_level,
-                    self.branching_level,
-                    self.calculate_load(m),
-                    self.inherit,
-                    result,
-                    max_recur]
-
-            writer.writerow(row)
+        row = [self.length,
+                self.number,
+                self.nesting_depth,
+                self.sharing_level,
+                self.branching_level,
+                self.calculate_load(m),
+                self.inherit,
+                result,
+                max_recur]
+
+        self.output.write(row)
+
+    def close_output(self):
+        self.output.close()
 
 
 # vim: tabstop=4 expandtab shiftwidth=4 softtabstop=4
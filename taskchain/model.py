@@ -21,6 +21,15 @@ import math
 import logging
 import copy
 import warnings
+import itertools
+import types
+
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+
+import numpy as np
 
 from pycpa import options
 from pycpa import util
@@ -97,14 +106,40 @@ class ResourceModel (object):
         self.exec_ctxs        = list()  # set of execution contexts
         self.sched_ctxs       = list()  # set of scheduling contexts
         self.tasklinks        = dict() # set of precedence relations (arcs in task graph)
+        self.predlinks        = dict() # reverse precedence relations (maintained along with tasklinks)
+        self.linktypes        = dict() # precedence type of every task link (True for strong precedence)
+        self.strong_tasklinks = dict() # strong precedence relations only
+        self.strong_predlinks = dict() # reverse strong precedence relations only
         self.allocations      = dict() # arcs between tasks and execution context
+        self.ctxallocs        = dict() # reverse arcs from execution contexts to tasks (maintained along with allocations)
         self.mappings         = dict() # edges between tasks and scheduling contexts
+        self.ctxmappings      = dict() # reverse edges from scheduling contexts to tasks (maintained along with mappings)
+
+        self._closures        = dict() # cached transitive closures (invalidated on modification)
+
+        self._unchecked_tasks = set()  # tasks modified since the last successful check()
+        self._unchecked_ctxs  = set()  # execution contexts modified since the last successful check()
+
+        # dense integer ids for bitset representations of task and context sets
+        self.task_ids         = dict() # task -> bit index
+        self.ctx_ids          = dict() # execution context -> bit index
+        self._id_tasks        = list() # bit index -> task
+        self._alloc_masks     = dict() # task -> bitset of allocated execution contexts
+        self._ctx_task_masks  = dict() # execution context -> bitset of allocating tasks
 
     def add_task(self, t):
         assert(isinstance(t, cpamodel.Task))
         self.tasks.add(t)
         self.tasklinks[t] = set()
+        self.predlinks[t] = set()
+        self.strong_tasklinks[t] = set()
+        self.strong_predlinks[t] = set()
         self.junclinks[t] = None
+        if t not in self.task_ids:
+            self.task_ids[t] = len(self._id_tasks)
+            self._id_tasks.append(t)
+            self._alloc_masks[t] = 0
+        self._unchecked_tasks.add(t)
         return t
 
     def add_junction(self, j):
@@ -129,93 +164,239 @@ class ResourceModel (object):
     def add_scheduling_context(self, s):
         assert(isinstance(s, SchedulingContext))
         self.sched_ctxs.append(s)
+        self.ctxmappings[s] = set()
         return s
 
     def add_execution_context(self, e):
         assert(isinstance(e, ExecutionContext))
         self.exec_ctxs.append(e)
+        self.ctxallocs[e] = dict()
+        self.ctx_ids[e] = len(self.ctx_ids)
+        self._ctx_task_masks[e] = 0
+        self._unchecked_ctxs.add(e)
         return e
 
     def link_tasks(self, src, dst):
         assert(src in self.tasks)
         assert(dst in self.tasks)
         self.tasklinks[src].add(dst)
+        self.predlinks[dst].add(src)
+        self._classify_link(src, dst)
+        self._invalidate_closures()
+        self._unchecked_tasks.update((src, dst))
 
     def unlink_tasks(self, src, dst):
         assert src in self.tasks
         assert dst in self.tasks
         assert dst in self.tasklinks[src]
         self.tasklinks[src].remove(dst)
+        self.predlinks[dst].remove(src)
+        del self.linktypes[(src, dst)]
+        self.strong_tasklinks[src].discard(dst)
+        self.strong_predlinks[dst].discard(src)
+        self._invalidate_closures()
+        self._unchecked_tasks.update((src, dst))
+
+    def _classify_link(self, src, dst):
+        """ (re-)computes the precedence type of the given task link from the allocations """
+        strong = False
+        if src in self.allocations and dst in self.allocations:
+            for ctx, blocking in self.allocations[src].items():
+                if blocking and ctx in self.allocations[dst]:
+                    strong = True
+                    break
+
+        self.linktypes[(src, dst)] = strong
+        if strong:
+            self.strong_tasklinks[src].add(dst)
+            self.strong_predlinks[dst].add(src)
+        else:
+            self.strong_tasklinks[src].discard(dst)
+            self.strong_predlinks[dst].discard(src)
+
+    def _classify_links(self, t):
+        """ re-computes the precedence types of all links from and to t """
+        for dst in self.tasklinks[t]:
+            self._classify_link(t, dst)
+        for src in self.predlinks[t]:
+            self._classify_link(src, t)
 
     def assign_execution_context(self, t, e, blocking=False):
         assert(t in self.tasks)
-        assert(e in self.exec_ctxs)
+        assert(e in self.ctxallocs)
 
         if t not in self.allocations:
             self.allocations[t] = dict()
 
         self.allocations[t][e] = blocking
+        self.ctxallocs[e][t] = blocking
+        self._alloc_masks[t] |= 1 << self.ctx_ids[e]
+        self._ctx_task_masks[e] |= 1 << self.task_ids[t]
+        self._classify_links(t)
+        self._invalidate_closures()
+        self._allocation_modified(t, e)
+
+    def unassign_execution_context(self, t, e):
+        assert t in self.tasks
+        assert e in self.allocations[t]
+
+        del self.allocations[t][e]
+        del self.ctxallocs[e][t]
+        self._alloc_masks[t] &= ~(1 << self.ctx_ids[e])
+        self._ctx_task_masks[e] &= ~(1 << self.task_ids[t])
+        self._classify_links(t)
+        self._invalidate_closures()
+        self._allocation_modified(t, e)
+
+    def _allocation_modified(self, t, e):
+        # the checks of t's neighbours depend on t's allocations
+        self._unchecked_tasks.add(t)
+        self._unchecked_tasks.update(self.tasklinks[t])
+        self._unchecked_tasks.update(self.predlinks[t])
+        self._unchecked_ctxs.add(e)
 
     def assign_scheduling_context(self, t, s):
         assert(t not in self.mappings)
         assert(t in self.tasks)
-        assert(s in self.sched_ctxs)
+        assert(s in self.ctxmappings)
 
         self.mappings[t] = s
+        self.ctxmappings[s].add(t)
+        self._unchecked_tasks.add(t)
         t.scheduling_parameter = s.get_scheduling_parameter(t)
 
     def scheduled_tasks(self, s):
-        tasks = set()
-        for t in self.tasks:
-            if self.mappings[t] is s:
-                tasks.add(t)
-
-        return tasks
+        return set(self.ctxmappings[s])
 
     def allocating_tasks(self, e, only_released=False):
-        tasks = set()
-        for t in self.tasks:
-            if t in self.allocations and e in self.allocations[t]:
-                if not only_released:
-                    tasks.add(t)
-                elif self.allocations[t][e] is False:
-                    tasks.add(t)
+        if not only_released:
+            return set(self.ctxallocs[e].keys())
 
-        return tasks
+        return set([t for t, blocking in self.ctxallocs[e].items() if blocking is False])
 
     def update_scheduling_parameters(self, s):
-        for t in self.tasks:
-            if self.mappings[t] is s:
-                t.scheduling_parameter = s.get_scheduling_parameter(t)
+        resources = set()
+        for t in self.ctxmappings[s]:
+            t.scheduling_parameter = s.get_scheduling_parameter(t)
+            if isinstance(t.resource, TaskchainResource):
+                resources.add(t.resource)
+
+        # the schedulers cache sets and busy windows that depend on the priorities
+        for r in resources:
+            r.scheduler.invalidate()
+
+    def _invalidate_closures(self):
+        self._closures = dict()
+
+    def _closure(self, task, reverse, only_strong):
+        """ returns the (cached) set of tasks reachable from task, following the reversed task links if reverse=True """
+        key = (task, reverse, only_strong)
+        if key in self._closures:
+            return self._closures[key]
+
+        # iterative post-order traversal so that the closures of all visited tasks are cached as well
+        stack = [(task, False)]
+        on_stack = set() # tasks being expanded (i.e. on the current path)
+        while stack:
+            t, expanded = stack.pop()
+            if (t, reverse, only_strong) in self._closures:
+                continue
 
-    def predecessors(self, task, only_strong=False, recursive=False):
-        predecessors = set()
-        for t in self.tasklinks.keys():
-            if task in self.tasklinks[t]:
-                if not only_strong or self.is_strong_precedence(t, task):
-                    predecessors.add(t)
+            if not expanded and t in on_stack:
+                raise ValueError("Task graph contains a cycle through %s." % t)
+
+            if reverse:
+                neighbours = self.strong_predlinks[t] if only_strong else self.predlinks[t]
+            else:
+                neighbours = self.strong_tasklinks[t] if only_strong else self.tasklinks[t]
+
+            if not expanded:
+                on_stack.add(t)
+                stack.append((t, True))
+                for n in neighbours:
+                    if (n, reverse, only_strong) not in self._closures:
+                        stack.append((n, False))
+            else:
+                result = set(neighbours)
+                for n in neighbours:
+                    result.update(self._closures[(n, reverse, only_strong)])
+                self._closures[(t, reverse, only_strong)] = frozenset(result)
+                on_stack.discard(t)
 
-        result = predecessors.copy()
+        return self._closures[key]
+
+    def predecessors(self, task, only_strong=False, recursive=False):
         if recursive:
-            for t in predecessors:
-                result.update(self.predecessors(t, only_strong=only_strong, recursive=recursive))
+            return set(self._closure(task, reverse=True, only_strong=only_strong))
+
+        if only_strong:
+            return set(self.strong_predlinks[task])
 
-        return result
+        return set(self.predlinks[task])
 
     def successors(self, task, only_strong=False, recursive=False):
-        successors = set()
-        successors.update(self.tasklinks[task])
+        if recursive:
+            return set(self._closure(task, reverse=False, only_strong=only_strong))
 
         if only_strong:
-            result = set([s for s in successors if self.is_strong_precedence(task, s)])
-        else:
-            result = set(successors)
+            return set(self.strong_tasklinks[task])
 
-        if recursive:
-            for t in copy.copy(result):
-                result.update(self.successors(t, only_strong=only_strong, recursive=recursive))
+        return set(self.tasklinks[task])
+
+    def task_mask(self, tasks):
+        """ returns the bitset (int) representation of the given tasks """
+        mask = 0
+        for t in tasks:
+            mask |= 1 << self.task_ids[t]
+
+        return mask
+
+    def mask_tasks(self, mask):
+        """ returns the set of tasks represented by the given bitset """
+        tasks = set()
+        while mask:
+            low = mask & -mask
+            tasks.add(self._id_tasks[low.bit_length()-1])
+            mask ^= low
+
+        return tasks
+
+    def mask_array(self, mask, contexts=False):
+        """ returns the given bitset as NumPy bool array indexed by task id (or by ctx_ids if contexts=True) """
+        n = len(self.ctx_ids) if contexts else len(self._id_tasks)
+        bits = np.frombuffer(mask.to_bytes((n + 7) // 8, 'little'), dtype=np.uint8)
+        return np.unpackbits(bits, count=n, bitorder='little').astype(bool)
+
+    def array_mask(self, array):
+        """ returns the bitset represented by the given NumPy bool array (see mask_array()) """
+        return int.from_bytes(np.packbits(np.asarray(array, dtype=bool), bitorder='little').tobytes(), 'little')
+
+    def predecessor_mask(self, task, only_strong=False):
+        """ returns the recursive predecessors of task as bitset """
+        return self._closure_mask(task, reverse=True, only_strong=only_strong)
+
+    def successor_mask(self, task, only_strong=False):
+        """ returns the recursive successors of task as bitset """
+        return self._closure_mask(task, reverse=False, only_strong=only_strong)
+
+    def _closure_mask(self, task, reverse, only_strong):
+        key = (task, reverse, only_strong, 'mask')
+        if key not in self._closures:
+            self._closures[key] = self.task_mask(self._closure(task, reverse, only_strong))
+
+        return self._closures[key]
+
+    def allocation_mask(self, task):
+        """ returns the execution contexts allocated by task as bitset (see ctx_ids) """
+        return self._alloc_masks[task]
 
-        return result
+    def sharing_mask(self, task):
+        """ returns the tasks (incl. task) that allocate any execution context of task as bitset """
+        mask = 0
+        for e in self.allocations[task]:
+            mask |= self._ctx_task_masks[e]
+
+        return mask
 
     def strong_chain(self, task):
         """ assuming there is no task with multiple strict successors, returns strict chain starting from given task """
@@ -233,11 +414,7 @@ class ResourceModel (object):
             return False
 
         assert dst in self.tasklinks[src], "No tasklink for %s to %s in %s." % (src, dst, self.tasklinks[src])
-        for ctx, blocking in self.allocations[src].items():
-            if blocking and ctx in self.allocations[dst]:
-                return True
-
-        return False
+        return self.linktypes[(src, dst)]
 
     def get_mutex_interferers(self, task):
         interferers = set()
@@ -273,6 +450,82 @@ class ResourceModel (object):
         segment.reverse()
         return segment
 
+    def freeze(self):
+        """ returns an immutable, array-backed snapshot of this model (see CompiledModel) """
+        return CompiledModel(self)
+
+    def clone(self, name=None, share_tasks=False):
+        """ Returns a structural copy of this model without deep-copying or re-parsing it.
+
+        Execution contexts, junctions and event models are shared between both models. Tasks and scheduling
+        contexts are copied so that the clone can be re-prioritised and analysed side by side with this model.
+        With share_tasks=True, only the relations are copied, which suffices for variants created by
+        relax_model() or move_forks_to_chainend(). Note that models sharing their tasks must not be bound to
+        different resources at the same time.
+        """
+        c = ResourceModel(self.name if name is None else name)
+
+        if share_tasks:
+            T = lambda t: t
+            S = lambda s: s
+        else:
+            tasks = dict([(t, self._copy_task(t)) for t in self._id_tasks])
+            ctxs  = dict([(s, copy.copy(s)) for s in self.sched_ctxs])
+            T = tasks.__getitem__
+            S = ctxs.__getitem__
+
+        c.tasks            = set(map(T, self.tasks))
+        c.junctions        = set(self.junctions)
+        c.juncinputs       = dict([(j, set(map(T, ts))) for j, ts in self.juncinputs.items()])
+        c.junclinks        = dict([(T(t), j) for t, j in self.junclinks.items()])
+        c.exec_ctxs        = list(self.exec_ctxs)
+        c.sched_ctxs       = list(map(S, self.sched_ctxs))
+        c.tasklinks        = dict([(T(t), set(map(T, ts))) for t, ts in self.tasklinks.items()])
+        c.predlinks        = dict([(T(t), set(map(T, ts))) for t, ts in self.predlinks.items()])
+        c.linktypes        = dict([((T(src), T(dst)), v) for (src, dst), v in self.linktypes.items()])
+        c.strong_tasklinks = dict([(T(t), set(map(T, ts))) for t, ts in self.strong_tasklinks.items()])
+        c.strong_predlinks = dict([(T(t), set(map(T, ts))) for t, ts in self.strong_predlinks.items()])
+        c.allocations      = dict([(T(t), dict(a)) for t, a in self.allocations.items()])
+        c.ctxallocs        = dict([(e, dict([(T(t), b) for t, b in a.items()])) for e, a in self.ctxallocs.items()])
+        c.mappings         = dict([(T(t), S(s)) for t, s in self.mappings.items()])
+        c.ctxmappings      = dict([(S(s), set(map(T, ts))) for s, ts in self.ctxmappings.items()])
+
+        c.task_ids         = dict([(T(t), i) for t, i in self.task_ids.items()])
+        c.ctx_ids          = dict(self.ctx_ids)
+        c._id_tasks        = list(map(T, self._id_tasks))
+        c._alloc_masks     = dict([(T(t), m) for t, m in self._alloc_masks.items()])
+        c._ctx_task_masks  = dict(self._ctx_task_masks)
+
+        if share_tasks:
+            # cached closures remain valid as long as the clone is not modified
+            c._closures    = dict(self._closures)
+
+        c._unchecked_tasks = set(map(T, self._unchecked_tasks))
+        c._unchecked_ctxs  = set(self._unchecked_ctxs)
+
+        return c
+
+    @staticmethod
+    def _copy_task(t):
+        """ copies a task's parameters (the event model is shared) but none of its links and bindings """
+        n = copy.copy(t)
+        n.next_tasks = set()
+        n.prev_task  = None
+        n.resource   = None
+        if hasattr(n, 'chain'):
+            n.chain = None
+
+        return n
+
+    def _reset_local_links(self):
+        """ removes the pycpa links between tasks and junctions of this model, links to other models are kept """
+        local = lambda x: x in self.tasks or x in self.junctions
+        for t in self.tasks:
+            if any([local(n) for n in t.next_tasks]):
+                t.next_tasks = set([n for n in t.next_tasks if not local(n)])
+            if local(t.prev_task):
+                t.prev_task = None
+
     def move_forks_to_chainend(self):
         # for analyses that assume disjoint chains, we must assure that forks do only occur at chain ends
         #  Thus, if there is a fork with one strict successors and other weak successors,
@@ -282,10 +535,8 @@ class ResourceModel (object):
         #  However, the best case will be optimistic (i.e. bigger than the actual best case). We add a
         #  warning to point this out. Alternatively, we could modify the path analysis to work on the
         #  original model.
+        self._reset_local_links()
         for t in self.tasks:
-            if t.next_tasks:
-                t.next_tasks = set()
-                t.prev_task = None
             if len(self.successors(t, only_strong=True)) and len(self.successors(t)) > 1:
                 strict_chain = self.strong_chain(t)
                 for s in self.successors(t) - {strict_chain[1]}:
@@ -366,20 +617,59 @@ class ResourceModel (object):
         return new_paths
 
     def paths(self, root):
-        paths = set()
+        return set(self.iter_paths(root))
+
+    def iter_paths(self, root):
+        """ generates all paths from root to a leaf (depth-first, without recursion) """
+        if not self.tasklinks[root]:
+            yield (root,)
+            return
+
+        # the current path is shared by all paths with the same prefix
         cur_path = [root]
+        stack = [iter(self.tasklinks[root])]
+        while stack:
+            t = next(stack[-1], None)
+            if t is None:
+                stack.pop()
+                cur_path.pop()
+                continue
 
-        successors = self.successors(root)
-        if len(successors) == 0:
-            paths.add(tuple(cur_path))
-        else:
-            for t in successors:
-                for sub_path in self.paths(t):
-                    path = copy.copy(cur_path)
-                    path += sub_path
-                    paths.add(tuple(path))
+            cur_path.append(t)
+            if self.tasklinks[t]:
+                stack.append(iter(self.tasklinks[t]))
+            else:
+                yield tuple(cur_path)
+                cur_path.pop()
+
+    def count_paths(self, root):
+        """ returns the number of paths from root to a leaf without enumerating them """
+        # iterative post-order traversal so that the count of every (shared) successor is only computed once
+        counts = dict()
+        stack = [(root, False)]
+        on_stack = set() # tasks being expanded (i.e. on the current path)
+        while stack:
+            t, expanded = stack.pop()
+            if t in counts:
+                continue
+
+            if not expanded:
+                if t in on_stack:
+                    raise ValueError("Task graph contains a cycle through %s." % t)
 
-        return paths
+                on_stack.add(t)
+                stack.append((t, True))
+                for s in self.tasklinks[t]:
+                    if s not in counts:
+                        stack.append((s, False))
+            else:
+                if self.tasklinks[t]:
+                    counts[t] = sum([counts[s] for s in self.tasklinks[t]])
+                else:
+                    counts[t] = 1
+                on_stack.discard(t)
+
+        return counts[root]
 
     def root_path(self, endpoint):
         path = [endpoint]
@@ -417,7 +707,7 @@ class ResourceModel (object):
                 ei += 1
                 inserted += 1
                 # change for strict predecessors of t that alloc e
-                del self.allocations[t][e]
+                self.unassign_execution_context(t, e)
                 self.assign_execution_context(t, ctx, blocking=False)
                 tt = t
                 while len(self.predecessors(tt)):
@@ -427,19 +717,28 @@ class ResourceModel (object):
                         break
 
                     tt = pred
-                    del self.allocations[tt][e]
+                    self.unassign_execution_context(tt, e)
                     self.assign_execution_context(tt, ctx, blocking=True)
 
         return inserted
 
-    def check(self):
+    def check(self, full=False):
+        """ Validates the model. Only tasks and execution contexts that were modified since the last successful
+            check are validated unless full=True. """
+        if full:
+            tasks = self.tasks
+            ctxs  = self.exec_ctxs
+        else:
+            tasks = self._unchecked_tasks
+            ctxs  = self._unchecked_ctxs
+
         #####################
         # task graph checks #
         #####################
 
         # if a task blocks an execution context:
         #  - it must have exactly one successor that also blocks/releases the same execution context
-        for t in self.tasks:
+        for t in tasks:
             assert t in self.allocations, 'no allocation for task %s' % t
             for e, blocking in self.allocations[t].items():
                 if blocking:
@@ -456,7 +755,7 @@ class ResourceModel (object):
 
 
         # there is at most one strong predecessor (and only if there is no weak predecessor)
-        for t in self.tasks:
+        for t in tasks:
             strong_pred = 0
             weak_pred = 0
             for pred in self.predecessors(t):
@@ -478,19 +777,18 @@ class ResourceModel (object):
         # allocation graph checks #
         ###########################
 
-        for t in self.tasks:
+        for t in tasks:
             assert t in self.allocations and len(self.allocations[t]) > 0, \
                    "Task %s is not assigned to an execution context" % t.name
 
-        for e in self.exec_ctxs:
+        for e in ctxs:
             blocking_count = 0
             release_count = 0
-            for ctxs in self.allocations.values():
-                if e in ctxs:
-                    if ctxs[e]:
-                        blocking_count += 1
-                    else:
-                        release_count +=1
+            for blocking in self.ctxallocs[e].values():
+                if blocking:
+                    blocking_count += 1
+                else:
+                    release_count +=1
 
             assert blocking_count == 0 or release_count > 0, \
                    "execution context %s is never released" % e.name
@@ -499,34 +797,42 @@ class ResourceModel (object):
         # mapping graph checks #
         ########################
         
-        for t in self.tasks:
+        for t in tasks:
             assert t in self.mappings and self.mappings[t] is not None, \
                    "Task %s is not assigned to a scheduling context" % t.name
 
+        self._unchecked_tasks = set()
+        self._unchecked_ctxs  = set()
+
         return True
 
     @staticmethod
     def write_dot(models, filename):
+        with open(filename, 'w+') as dotfile:
+            ResourceModel.dump_dot(models, dotfile)
+
+    @staticmethod
+    def dump_dot(models, dotfile):
+        """ Writes the DOT graph of the given models into an open text file. """
         convert_label = lambda label: label.replace('-', '_').replace(':', '')
 
-        with open(filename, 'w+') as dotfile:
-            dotfile.write("digraph g {\n")
+        dotfile.write("digraph g {\n")
 
-            i = 0
-            for m in models:
-                m._write_dot(dotfile, "cluster%d" % i)
-                i += 1
+        i = 0
+        for m in models:
+            m._write_dot(dotfile, "cluster%d" % i)
+            i += 1
 
-            # add inter-resource task links
-            for m in models:
-                for t in m.tasks:
-                    if t.prev_task and isinstance(t, cpamodel.Task) and isinstance(t.prev_task, cpamodel.Task):
-                        if t.prev_task.resource != t.resource:
-                            dotfile.write("  %s -> %s" % (convert_label(t.prev_task.name), convert_label(t.name)))
+        # add inter-resource task links
+        for m in models:
+            for t in m.tasks:
+                if t.prev_task and isinstance(t, cpamodel.Task) and isinstance(t.prev_task, cpamodel.Task):
+                    if t.prev_task.resource != t.resource:
+                        dotfile.write("  %s -> %s" % (convert_label(t.prev_task.name), convert_label(t.name)))
 
-            dotfile.write("}")
+        dotfile.write("}")
 
-    def _write_dot(self, dotfile, name="cluster0"):
+    def _write_dot(self, dotfile, name="cluster0", chunksize=4096):
 
         convert_label = lambda label: label.replace('-', '_').replace(':', '')
 
@@ -542,77 +848,314 @@ class ResourceModel (object):
         task_edge_styles = { "strong" : "",
                              "weak"   : "style=dashed, arrowhead=open" }
     
-        dotfile.write("subgraph %s {\n" % name)
-        dotfile.write("  label=\"%s\";" % convert_label(self.name))
+        labels = dict([(o, convert_label(o.name)) for o in
+            itertools.chain(self.tasks, self.junctions, self.exec_ctxs, self.sched_ctxs)])
+
+        # lines are collected and written in chunks of about chunksize entries
+        out = ["subgraph %s {\n" % name, "  label=\"%s\";" % convert_label(self.name)]
+        def flush(force=False):
+            if force or len(out) >= chunksize:
+                dotfile.write(''.join(out))
+                del out[:]
 
         # add task nodes
-        for t in self.tasks:
-            uda = ',wcet=%d,bcet=%d' % (t.wcet, t.bcet)
-            dotfile.write("  %s [%s%s];\n" % (convert_label(t.name), styles['task'], uda))
+        style = styles['task']
+        out.extend(["  %s [%s,wcet=%d,bcet=%d];\n" % (labels[t], style, t.wcet, t.bcet) for t in self.tasks])
+        flush()
 
         # add junction nodes
-        for j in self.junctions:
-            dotfile.write("  %s [%s];\n" % (convert_label(j.name), styles['junction']))
+        style = styles['junction']
+        out.extend(["  %s [%s];\n" % (labels[j], style) for j in self.junctions])
 
         # add exec context nodes
-        for e in self.exec_ctxs:
-            dotfile.write("  %s [%s];\n" % (convert_label(e.name), styles['exec']))
+        style = styles['exec']
+        out.extend(["  %s [%s];\n" % (labels[e], style) for e in self.exec_ctxs])
 
         # add sched context nodes
-        for s in self.sched_ctxs:
-            uda = ',priority=%d' % s.priority
-            dotfile.write("  %s [%s%s];\n" % (convert_label(s.name), styles['sched'], uda))
-
-        # add task links
-        for src in self.tasklinks.keys():
-            for dst in self.tasklinks[src]:
-                if self.is_strong_precedence(src, dst):
-                    style = task_edge_styles["strong"]
-                else:
-                    style = task_edge_styles["weak"]
-
-                dotfile.write("  %s -> %s [%s];\n" % (convert_label(src.name),
-                    convert_label(dst.name),
-                    style))
+        style = styles['sched']
+        out.extend(["  %s [%s,priority=%d];\n" % (labels[s], style, s.priority) for s in self.sched_ctxs])
+        flush()
+
+        # add task links (strong precedence is maintained along with the links)
+        strong, weak = task_edge_styles['strong'], task_edge_styles['weak']
+        for src, dsts in self.tasklinks.items():
+            strong_dsts = self.strong_tasklinks[src]
+            out.extend(["  %s -> %s [%s];\n" % (labels[src], labels[dst], strong if dst in strong_dsts else weak)
+                        for dst in dsts])
+            flush()
 
         # add junction links
-        for t, j in self.junclinks.items():
-            if j:
-                style = task_edge_styles['weak']
-                dotfile.write("  %s -> %s [%s];\n" % (convert_label(j.name),
-                    convert_label(t.name),
-                    style))
+        out.extend(["  %s -> %s [%s];\n" % (labels[j], labels[t], weak) for t, j in self.junclinks.items() if j])
 
         # add junction inputs
-        for j, ts in self.juncinputs.items():
-            for t in ts:
-                style = task_edge_styles['weak']
-                dotfile.write("  %s -> %s [%s];\n" % (convert_label(t.name),
-                    convert_label(j.name),
-                    style))
+        out.extend(["  %s -> %s [%s];\n" % (labels[t], labels[j], weak) for j, ts in self.juncinputs.items() for t in ts])
+        flush()
 
         # add exec context allocations
-        for t in self.allocations.keys():
-            for ctx, blocking in self.allocations[t].items():
-                target = convert_label(ctx.name)
+        style = edge_styles['exec']
+        for t, data in self.allocations.items():
+            for ctx, blocking in data.items():
                 if blocking:
-                    source = convert_label(t.name)
-                    target = convert_label(ctx.name)
+                    out.append("  %s -> %s [%s];\n" % (labels[t], labels[ctx], style))
                 else:
-                    target = convert_label(t.name)
-                    source = convert_label(ctx.name)
-
-                dotfile.write("  %s -> %s [%s];\n" % (source,
-                    target,
-                    edge_styles["exec"]))
+                    out.append("  %s -> %s [%s];\n" % (labels[ctx], labels[t], style))
+            flush()
 
         # add sched context mappings
-        for t in self.mappings.keys():
-            dotfile.write("  %s -> %s [%s];\n" % (convert_label(t.name),
-                convert_label(self.mappings[t].name),
-                edge_styles["sched"]))
+        style = edge_styles['sched']
+        out.extend(["  %s -> %s [%s];\n" % (labels[t], labels[s], style) for t, s in self.mappings.items()])
+
+        out.append("}")
+        flush(force=True)
+
+class _FrozenMapping (Mapping):
+    """ Read-only mapping whose values are computed on first access and cached afterwards. """
+
+    def __init__(self, keys, getter):
+        self._keys = keys
+        self._getter = getter
+        self._values = dict()
+
+    def __getitem__(self, key):
+        try:
+            return self._values[key]
+        except KeyError:
+            if key not in self._keys:
+                raise
+
+        value = self._getter(key)
+        self._values[key] = value
+        return value
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+class CompiledModel (ResourceModel):
+    """ Immutable snapshot of a ResourceModel.
+
+    Task links, allocations and mappings are stored as CSR index arrays over the dense task and context ids of
+    the source model. Task and event-model parameters are stored as NumPy arrays (NaN if not available).
+    The dict-based attributes of ResourceModel (tasklinks, allocations, mappings, ...) are provided as read-only
+    views (materialised on first access per key) so that the schedulers and the path/chain construction can
+    work on the snapshot directly.
+
+    Modifications raise a TypeError. As the schedulers read the priorities from the tasks, a changed priority
+    assignment requires a new snapshot.
+    """
+
+    def __init__(self, m):
+        assert isinstance(m, ResourceModel)
+        ResourceModel.__init__(self, m.name)
+
+        self._id_tasks  = tuple(m._id_tasks)
+        self.task_ids   = dict(m.task_ids)
+        self.tasks      = frozenset(self._id_tasks)
+        self.exec_ctxs  = tuple(m.exec_ctxs)
+        self.ctx_ids    = dict(m.ctx_ids)
+        self.sched_ctxs = tuple(m.sched_ctxs)
+        self.sched_ids  = dict([(s, i) for i, s in enumerate(self.sched_ctxs)])
+
+        self.junctions  = frozenset(m.junctions)
+        self.juncinputs = dict([(j, frozenset(ts)) for j, ts in m.juncinputs.items()])
+        self.junclinks  = dict(m.junclinks)
+
+        ids = self.task_ids
+        tasks = self._id_tasks
+
+        # CSR adjacency of task links
+        self.succ_ptr, self.succ_idx = self._csr([[ids[d] for d in m.tasklinks[t]] for t in tasks])
+        self.pred_ptr, self.pred_idx = self._csr([[ids[s] for s in m.predlinks[t]] for t in tasks])
+        self.strong_succ_ptr, self.strong_succ_idx = self._csr([[ids[d] for d in m.strong_tasklinks[t]] for t in tasks])
+        self.strong_pred_ptr, self.strong_pred_idx = self._csr([[ids[s] for s in m.strong_predlinks[t]] for t in tasks])
+
+        # CSR allocation matrix (tasks x execution contexts) and its transpose
+        allocs = [sorted([(self.ctx_ids[e], b) for e, b in m.allocations.get(t, dict()).items()]) for t in tasks]
+        self.alloc_ptr, self.alloc_idx = self._csr([[e for e, b in a] for a in allocs])
+        self.alloc_blocking = np.array([b for a in allocs for e, b in a], dtype=bool)
+
+        ctxallocs = [sorted([(ids[t], b) for t, b in m.ctxallocs[e].items()]) for e in self.exec_ctxs]
+        self.ctx_ptr, self.ctx_idx = self._csr([[t for t, b in a] for a in ctxallocs])
+        self.ctx_blocking = np.array([b for a in ctxallocs for t, b in a], dtype=bool)
+
+        # mapping of tasks to scheduling contexts (-1 if not mapped)
+        self.mapping = np.array([self.sched_ids[m.mappings[t]] if t in m.mappings else -1 for t in tasks], dtype=np.int32)
+
+        # task parameters
+        self.wcet     = np.array([t.wcet for t in tasks], dtype=np.float64)
+        self.bcet     = np.array([t.bcet for t in tasks], dtype=np.float64)
+        self.priority = np.array([t.scheduling_parameter if t.scheduling_parameter is not None else np.nan
+                                  for t in tasks], dtype=np.float64)
+
+        # event-model parameters (only available for PJd event models)
+        pjd = [t.in_event_model if isinstance(t.in_event_model, cpamodel.PJdEventModel) else None for t in tasks]
+        self.period = np.array([em.P if em else np.nan for em in pjd], dtype=np.float64)
+        self.jitter = np.array([em.J if em else np.nan for em in pjd], dtype=np.float64)
+        self.dmin   = np.array([em.dmin if em else np.nan for em in pjd], dtype=np.float64)
+
+        # read-only views of the ResourceModel attributes
+        allocated = frozenset([t for t in tasks if t in m.allocations])
+        self.tasklinks   = _FrozenMapping(self.tasks, lambda t: self._neighbours(t, self.succ_ptr, self.succ_idx))
+        self.predlinks   = _FrozenMapping(self.tasks, lambda t: self._neighbours(t, self.pred_ptr, self.pred_idx))
+        self.strong_tasklinks = _FrozenMapping(self.tasks,
+                                               lambda t: self._neighbours(t, self.strong_succ_ptr, self.strong_succ_idx))
+        self.strong_predlinks = _FrozenMapping(self.tasks,
+                                               lambda t: self._neighbours(t, self.strong_pred_ptr, self.strong_pred_idx))
+        self.allocations = _FrozenMapping(allocated, self._allocations)
+        self.ctxallocs   = _FrozenMapping(frozenset(self.exec_ctxs), self._ctxallocs)
+        self.mappings    = _FrozenMapping(frozenset([t for t in tasks if self.mapping[ids[t]] >= 0]),
+                                          lambda t: self.sched_ctxs[self.mapping[ids[t]]])
+
+        # closure masks never change
+        self._closures = dict()
+
+        self._unchecked_tasks = set(self.tasks)
+        self._unchecked_ctxs  = set(self.exec_ctxs)
 
-        dotfile.write("}")
+    @staticmethod
+    def _csr(rows):
+        ptr = np.zeros(len(rows)+1, dtype=np.int32)
+        ptr[1:] = np.cumsum([len(r) for r in rows])
+        idx = np.array([i for r in rows for i in r], dtype=np.int32)
+        return ptr, idx
+
+    def _neighbours(self, t, ptr, idx):
+        i = self.task_ids[t]
+        return frozenset([self._id_tasks[j] for j in idx[ptr[i]:ptr[i+1]].tolist()])
+
+    def _allocations(self, t):
+        i = self.task_ids[t]
+        a, b = self.alloc_ptr[i], self.alloc_ptr[i+1]
+        return types.MappingProxyType(dict(zip([self.exec_ctxs[e] for e in self.alloc_idx[a:b].tolist()],
+                                               self.alloc_blocking[a:b].tolist())))
+
+    def _ctxallocs(self, e):
+        i = self.ctx_ids[e]
+        a, b = self.ctx_ptr[i], self.ctx_ptr[i+1]
+        return types.MappingProxyType(dict(zip([self._id_tasks[t] for t in self.ctx_idx[a:b].tolist()],
+                                               self.ctx_blocking[a:b].tolist())))
+
+    def _frozen(self, *args, **kwargs):
+        raise TypeError("CompiledModel %s cannot be modified." % self.name)
+
+    add_task                    = _frozen
+    add_junction                = _frozen
+    connect_junction            = _frozen
+    link_junction               = _frozen
+    add_scheduling_context      = _frozen
+    add_execution_context       = _frozen
+    link_tasks                  = _frozen
+    unlink_tasks                = _frozen
+    assign_execution_context    = _frozen
+    unassign_execution_context  = _frozen
+    assign_scheduling_context   = _frozen
+    update_scheduling_parameters = _frozen
+    relax_model                 = _frozen
+
+    def freeze(self):
+        return self
+
+    def clone(self, name=None, share_tasks=False):
+        raise TypeError("CompiledModel %s cannot be cloned, clone the source ResourceModel instead." % self.name)
+
+    def move_forks_to_chainend(self):
+        """ only resets the task links of the pycpa tasks, forks must have been moved before freezing """
+        for t in self.tasks:
+            if len(self.successors(t, only_strong=True)) and len(self.successors(t)) > 1:
+                raise ValueError("CompiledModel %s has a fork at %s, call move_forks_to_chainend() on the source " \
+                                 "model before freeze()." % (self.name, t))
+
+        self._reset_local_links()
+
+    def scheduled_tasks(self, s):
+        return set([self._id_tasks[i] for i in np.flatnonzero(self.mapping == self.sched_ids[s]).tolist()])
+
+    def allocating_tasks(self, e, only_released=False):
+        i = self.ctx_ids[e]
+        a, b = self.ctx_ptr[i], self.ctx_ptr[i+1]
+        tasks = self.ctx_idx[a:b]
+        if only_released:
+            tasks = tasks[~self.ctx_blocking[a:b]]
+
+        return set([self._id_tasks[t] for t in tasks.tolist()])
+
+    def predecessors(self, task, only_strong=False, recursive=False):
+        if recursive:
+            return self.mask_tasks(self.predecessor_mask(task, only_strong=only_strong))
+
+        if only_strong:
+            return set(self.strong_predlinks[task])
+
+        return set(self.predlinks[task])
+
+    def successors(self, task, only_strong=False, recursive=False):
+        if recursive:
+            return self.mask_tasks(self.successor_mask(task, only_strong=only_strong))
+
+        if only_strong:
+            return set(self.strong_tasklinks[task])
+
+        return set(self.tasklinks[task])
+
+    def _closure_mask(self, task, reverse, only_strong):
+        if reverse:
+            ptr, idx = (self.strong_pred_ptr, self.strong_pred_idx) if only_strong else (self.pred_ptr, self.pred_idx)
+        else:
+            ptr, idx = (self.strong_succ_ptr, self.strong_succ_idx) if only_strong else (self.succ_ptr, self.succ_idx)
+
+        # iterative post-order traversal on task ids
+        root = self.task_ids[task]
+        stack = [(root, False)]
+        on_stack = set() # ids being expanded (i.e. on the current path)
+        while stack:
+            i, expanded = stack.pop()
+            if (i, reverse, only_strong) in self._closures:
+                continue
+
+            if not expanded and i in on_stack:
+                raise ValueError("Task graph contains a cycle through %s." % self._id_tasks[i])
+
+            neighbours = idx[ptr[i]:ptr[i+1]].tolist()
+            if not expanded:
+                on_stack.add(i)
+                stack.append((i, True))
+                for j in neighbours:
+                    if (j, reverse, only_strong) not in self._closures:
+                        stack.append((j, False))
+            else:
+                mask = 0
+                for j in neighbours:
+                    mask |= (1 << j) | self._closures[(j, reverse, only_strong)]
+                self._closures[(i, reverse, only_strong)] = mask
+                on_stack.discard(i)
+
+        return self._closures[(root, reverse, only_strong)]
+
+    def allocation_mask(self, task):
+        i = self.task_ids[task]
+        mask = 0
+        for e in self.alloc_idx[self.alloc_ptr[i]:self.alloc_ptr[i+1]].tolist():
+            mask |= 1 << e
+
+        return mask
+
+    def sharing_mask(self, task):
+        i = self.task_ids[task]
+        mask = 0
+        for e in self.alloc_idx[self.alloc_ptr[i]:self.alloc_ptr[i+1]].tolist():
+            for t in self.ctx_idx[self.ctx_ptr[e]:self.ctx_ptr[e+1]].tolist():
+                mask |= 1 << t
+
+        return mask
+
+    def is_strong_precedence(self, src, dst):
+        if dst in self.junctions:
+            return False
+
+        assert dst in self.tasklinks[src], "No tasklink for %s to %s." % (src, dst)
+        return dst in self.strong_tasklinks[src]
 
 class TaskchainResource (cpamodel.Resource):
     """ A Resource provides service to tasks. This Resource can contain task chains """
@@ -624,6 +1167,7 @@ class TaskchainResource (cpamodel.Resource):
         self.model = None
 
         self.chains = set() # task chains to be analysed
+        self.task_chains = dict() # task -> set of bound task chains containing the task
 
     def build_from_model(self, model):
         self.model = model
@@ -665,15 +1209,18 @@ class TaskchainResource (cpamodel.Resource):
         chain.tasks[-1].OutEventModelClass = propagation.BusyWindowPropagationEventModel
 
         self.chains.add(chain)
+        for t in chain.tasks:
+            self.task_chains.setdefault(t, set()).add(chain)
+
+        # sets of interfering tasks and busy windows depend on the bound chains
+        self.scheduler.invalidate()
 
         # NOTE how to use the same analysis result for every task in the chain
 
         return chain
 
     def create_taskchains(self, single=False):
-        chained_tasks = set()
-        for c in self.chains:
-            chained_tasks.add(c.tasks)
+        chained_tasks = set(self.task_chains.keys())
 
         if single:
             # add remaining tasks as single-task "chains"
@@ -690,7 +1237,7 @@ class TaskchainResource (cpamodel.Resource):
             # perform a DFS to identify all paths
             paths = list()
             for r in roots - chained_tasks:
-                paths += self.model.paths(r)
+                paths.extend(self.model.iter_paths(r))
 
             if isinstance(self.scheduler, (SPPSchedulerSegmentsUniform, SPPSchedulerSimple)):
                 # split at forks, remove subpaths, and whenever precedence type changes
@@ -698,7 +1245,8 @@ class TaskchainResource (cpamodel.Resource):
                 paths = self.model.remove_subchains(paths)
                 paths = self.model.split_precedence(paths)
 
-                assert not self.model.tasks.symmetric_difference(set([t for p in paths for t in p])), "Not all tasks in paths."
+                assert not (self.model.tasks - chained_tasks).symmetric_difference(set([t for p in paths for t in p])), \
+                        "Not all tasks in paths."
 
             for p in paths:
                 self.bind_taskchain(Taskchain(p[0].name + "-" + p[-1].name, p))
@@ -710,4 +1258,37 @@ class TaskchainResource (cpamodel.Resource):
 
         return self.chains
 
+def build_system(models, scheduler, name="System", single=False):
+    """ Creates a pycpa System with one TaskchainResource per ResourceModel.
+
+        Links between tasks of different models (see Task.link_dependent_task) are preserved so
+        that event models are propagated across resources.
+
+        :param models: iterable of ResourceModels (e.g. the values returned by Graphml.models_from_file)
+        :param scheduler: callable returning a new scheduler (e.g. a scheduler class) or dict
+                          mapping resource names to such callables
+        :param single: analyse single tasks instead of task chains
+    """
+    s = cpamodel.System(name)
+
+    models = list(models)
+    resources = list()
+    for m in models:
+        factory = scheduler[m.name] if isinstance(scheduler, dict) else scheduler
+        r = s.bind_resource(TaskchainResource(m.name, scheduler=factory()))
+        r.build_from_model(m)
+        resources.append(r)
+
+    # chains are created after all tasks have been bound to their resources
+    for r in resources:
+        r.create_taskchains(single=single)
+
+    # links between resources must have survived building the resources (cf. move_forks_to_chainend())
+    for m in models:
+        for t in m.tasks:
+            for n in t.next_tasks:
+                assert n.prev_task is t, "Broken link from %s to %s." % (t, n)
+
+    return s
+
 # vim: tabstop=4 expandtab shiftwidth=4 softtabstop=4
@@ -26,15 +26,50 @@ from pycpa import model as pycpa_model
 from pycpa import util
 from . import model
 
-from networkx.readwrite import graphml
 import networkx as nx
 
 import typing
 
+import io
+import os
+import json
+import pickle
+import zipfile
+import hashlib
+from collections import deque, ChainMap
+from concurrent.futures import ProcessPoolExecutor
+from xml.etree import ElementTree
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
 logger = logging.getLogger(__name__)
 
+# GraphML attribute types (as understood by networkx)
+_graphml_types = {'integer' : int,
+                  'int'     : int,
+                  'long'    : int,
+                  'float'   : float,
+                  'double'  : float,
+                  'boolean' : bool,
+                  'string'  : str,
+                  'yfiles'  : str}
+
+_graphml_bools = {'true' : True, 'false' : False, '0' : False, '1' : True}
+
 class Graphml:
 
+    # bump whenever the layout of cached records changes
+    CACHE_VERSION = 1
+
+    def __init__(self, cache=False):
+        """ :param cache: store parsed files in binary form next to the GraphML files
+                          and reuse them as long as the file content is unchanged.
+        """
+        self.cache = cache
+
     @staticmethod
     def model_to_file(m: model.ResourceModel, filename, from_time_base=util.us, to_time_base=util.us):
         # first, put model into a networkx graph
@@ -74,8 +109,17 @@ class Graphml:
         nx.write_graphml(g, filename, prettyprint=True)
 
     def model_from_file(self, filename, resname=None, from_time_base=util.us, to_time_base=util.us):
+        models = self.models_from_file(filename, from_time_base, to_time_base, resname=resname)
+        return self._select(models, resname)
+
+    def system_from_file(self, filename, scheduler, name="System", single=False,
+                         from_time_base=util.us, to_time_base=util.us):
+        """ Loads all resources of a file into a pycpa System (see :func:`taskchain.model.build_system`). """
         models = self.models_from_file(filename, from_time_base, to_time_base)
+        return model.build_system(models.values(), scheduler, name=name, single=single)
 
+    @staticmethod
+    def _select(models, resname):
         if resname is not None:
             return models[resname]
         elif len(models) == 1:
@@ -84,94 +128,596 @@ class Graphml:
             raise Exception("error")
 
     def apply_defaults(self, g):
-        for attr, default in g.graph['node_default'].items():
+        """ Fills in missing node and edge attributes of a networkx graph (in a single pass each).
+
+            The parser itself does not use networkx, it looks up node defaults lazily (see _read()).
+        """
+        node_default = g.graph.get('node_default')
+        if node_default:
             for node, data in g.nodes(data=True):
-                if attr not in data:
-                    data[attr] = default
+                data.update(ChainMap(data, node_default))
 
-        for attr, default in g.graph['edge_default'].items():
+        edge_default = g.graph.get('edge_default')
+        if edge_default:
             for u, v, data in g.edges(data=True):
-                if attr not in data:
-                    data[attr] = default
+                data.update(ChainMap(data, edge_default))
+
+    def models_from_file(self, filename, from_time_base=util.us, to_time_base=util.us, resname=None):
+        """ :param resname: only build the model of this resource; tasks of other resources that
+                            are linked to it are represented by stub tasks (not part of any model).
+        """
+        if self.cache:
+            digest = self._digest(filename)
+            records = self._load_cache(filename, digest)
+            if records is not None:
+                return self._build(records, from_time_base, to_time_base, resname)
+
+        models, records = self._parse(filename, from_time_base, to_time_base, resname)
+        if self.cache:
+            self._store_cache(filename, digest, records)
 
-    def models_from_file(self, filename, from_time_base=util.us, to_time_base=util.us):
-        g = graphml.read_graphml(filename, node_type=str, edge_key_type=str)
-        self.apply_defaults(g)
+        return models
+
+    def records_from_file(self, filename):
+        """ Returns the picklable parser records of a file (see :meth:`model_from_records`). """
+        if self.cache:
+            digest = self._digest(filename)
+            records = self._load_cache(filename, digest)
+            if records is None:
+                records = self._read(filename)
+                self._store_cache(filename, digest, records)
+
+            return records
+
+        return self._read(filename)
+
+    def model_from_records(self, records, resname=None, from_time_base=util.us, to_time_base=util.us):
+        models = self._build(records, from_time_base, to_time_base, resname)
+        return self._select(models, resname)
+
+    def models_from_folder(self, folder, settings, resname=None, processes=None, prefetch=None,
+                           archive=None, from_time_base=util.us, to_time_base=util.us):
+        """ Loads the models referenced by settings (rows with a 'filename' relative to folder)
+            in a process pool.
+
+            :param processes: number of loader processes (default: cpu count, 0: load in this process)
+            :param prefetch: maximum number of files being loaded ahead (default: 2*processes)
+            :param archive: name of a :class:`ModelArchive` in folder that contains the files
+            :returns: generator of (setting, model) in the order of settings
+        """
+        if archive is not None:
+            archive = '%s/%s' % (folder, archive)
+
+        if processes == 0:
+            if archive is not None:
+                with ModelArchive(archive) as a:
+                    for s in settings:
+                        yield s, a.model(s['filename'], resname, from_time_base, to_time_base)
+            else:
+                for s in settings:
+                    yield s, self.model_from_file('%s/%s' % (folder, s['filename']), resname,
+                                                  from_time_base, to_time_base)
+            return
+
+        if processes is None:
+            processes = os.cpu_count() or 1
+        if prefetch is None:
+            prefetch = 2 * processes
+        assert prefetch > 0
+
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            pending = deque()
+            for s in settings:
+                pending.append((s, pool.submit(_records_from_file,
+                                                s['filename'] if archive else '%s/%s' % (folder, s['filename']),
+                                                self.cache, archive)))
+                if len(pending) < prefetch:
+                    continue
+
+                s, future = pending.popleft()
+                yield s, self.model_from_records(future.result(), resname, from_time_base, to_time_base)
+
+            while pending:
+                s, future = pending.popleft()
+                yield s, self.model_from_records(future.result(), resname, from_time_base, to_time_base)
+
+    @staticmethod
+    def cache_file(filename):
+        return filename + '.cache'
+
+    @staticmethod
+    def _digest(filename):
+        h = hashlib.sha1()
+        with open(filename, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 16), b''):
+                h.update(chunk)
+
+        return h.hexdigest()
+
+    def _load_cache(self, filename, digest):
+        try:
+            with open(self.cache_file(filename), 'rb') as f:
+                version, cached_digest, records = pickle.load(f)
+        except (OSError, EOFError, ValueError, pickle.UnpicklingError):
+            return None
+
+        if version != self.CACHE_VERSION or cached_digest != digest:
+            return None
+
+        return records
+
+    def _store_cache(self, filename, digest, records):
+        # write to a temporary file first so that concurrent readers never see partial data
+        cachefile = self.cache_file(filename)
+        tmpfile = '%s.%d' % (cachefile, os.getpid())
+        try:
+            with open(tmpfile, 'wb') as f:
+                pickle.dump((self.CACHE_VERSION, digest, records), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmpfile, cachefile)
+        except OSError as e:
+            logger.warning("Could not write cache file %s: %s" % (cachefile, e))
+
+    def _build(self, records, from_time_base, to_time_base, resname=None):
+        """ Builds ResourceModels from (cached) parser records. """
+        nodes, edges, graphname = records
+
+        models = dict()
+        objects = dict()
+        for n, data in nodes.items():
+            self._add_node(n, data, graphname, models, objects, from_time_base, to_time_base, resname)
+
+        self._add_edges(nodes, edges, graphname, models, objects, resname)
 
+        return models
+
+    def _parse(self, filename, from_time_base, to_time_base, resname=None):
+        """ Streams the first graph of a GraphML file into ResourceModels.
+
+            :returns: the models and the (nodes, edges, graphname) records they were built from
+        """
         models = dict()
 
         # store added objects by their corresponding task nodes
         objects = dict()
 
-        # iterate nodes
-        for n, data in g.nodes(data=True):
-            if 'resource' in data:
-                res = data['resource']
-            elif 'name' in g.graph:
-                res = g.graph['name']
-            else:
-                res = 'unknown'
+        add_node = lambda n, data, graphname: self._add_node(n, data, graphname, models, objects,
+                                                             from_time_base, to_time_base, resname)
+        nodes, edges, graphname = self._read(filename, add_node)
+        self._add_edges(nodes, edges, graphname, models, objects, resname)
+
+        return models, (nodes, edges, graphname)
+
+    def _read(self, filename, add_node=None):
+        """ Reads the first graph of a GraphML file into (nodes, edges, graphname) records.
+
+            Key defaults are looked up lazily while parsing; nodes and links are
+            processed in the same order as networkx's GraphML reader would.
+
+            :param add_node: called as add_node(n, data, graphname) for every node as soon as
+                             its resource is known, so that models can be built while parsing
+        """
+        nodes = dict()
+
+        # edges grouped by source node (in order of first appearance)
+        edges = dict()
+
+        keys = dict()
+        defaults = dict()
+        node_default = dict()
+        graph = None
+        graphname = None
+        pending = dict()
+
+        stack = list()
+        for event, elem in ElementTree.iterparse(filename, events=('start', 'end')):
+            tag = elem.tag.rpartition('}')[2]
+            if event == 'start':
+                stack.append(elem)
+                if tag == 'graph' and graph is None and len(stack) == 2:
+                    graph = elem
+                    for key_id, value in defaults.items():
+                        name, python_type, key_for = keys[key_id]
+                        if key_for == 'node':
+                            node_default[name] = python_type(value)
+                continue
+
+            stack.pop()
+            parent = stack[-1] if stack else None
+            if tag == 'key' and len(stack) == 1:
+                self._read_key(elem, keys, defaults)
+
+            elif parent is not graph:
+                continue
+
+            elif tag == 'data':
+                data = self._decode(elem, keys, dict())
+                if 'name' in data:
+                    graphname = data['name']
+                    self._flush_nodes(pending, graphname, add_node)
+
+            elif tag == 'node':
+                n = elem.get('id')
+                # a repeated node id updates the data of the first occurrence
+                if n in nodes:
+                    data = nodes[n]
+                else:
+                    # defaults are looked up lazily instead of being copied into every node
+                    data = nodes[n] = ChainMap(dict(), node_default) if node_default else dict()
+                    edges.setdefault(n, dict())
+
+                for child in elem:
+                    if child.tag.rpartition('}')[2] == 'data':
+                        self._decode(child, keys, data)
+
+                # without add_node, only the records are read (e.g. in a loader process)
+                if add_node is not None:
+                    if pending or ('resource' not in data and graphname is None):
+                        # resource name not known yet, defer (in order)
+                        pending[n] = data
+                    else:
+                        add_node(n, data, graphname)
+                elem.clear()
+
+            elif tag == 'edge':
+                edges.setdefault(elem.get('source'), dict())[elem.get('target')] = None
+                elem.clear()
+
+        self._flush_nodes(pending, graphname, add_node)
+
+        return nodes, edges, graphname
+
+    def _add_edges(self, nodes, edges, graphname, models, objects, resname=None):
+        for source, targets in edges.items():
+            for target in targets:
+                if resname is not None:
+                    # skip edges of other resources, but keep links to their tasks as stubs
+                    foreign = [n for n in (source, target) if self._resource(nodes[n], graphname) != resname]
+                    if len(foreign) == 2:
+                        continue
+                    if foreign and (nodes[source]['type'] != 'task' or nodes[target]['type'] != 'task'):
+                        continue
+
+                    for n in foreign:
+                        if n not in objects:
+                            objects[n] = pycpa_model.Task(n)
+                            objects[n].resname = self._resource(nodes[n], graphname)
+
+                if nodes[target]['type'] == "task":
+                    res = objects[target].resname
+                    edgetype = nodes[source]['type']
+                else:
+                    res = objects[source].resname
+                    edgetype = nodes[target]['type']
+
+                if edgetype == "task":
+                    if objects[source].resname == objects[target].resname:
+                        models[res].link_tasks(objects[source], objects[target])
+                    else:
+                        objects[source].link_dependent_task(objects[target])
+
+                elif edgetype == "sched":
+                    models[res].assign_scheduling_context(objects[source], objects[target])
+                elif edgetype == "exec":
+                    if nodes[source]['type'] == 'task':
+                        task = objects[source]
+                        ctx = objects[target]
+                        blocking = True
+                    else:
+                        task = objects[target]
+                        ctx = objects[source]
+                        blocking = False
+
+                    models[res].assign_execution_context(task, ctx, blocking=blocking)
+
+    def _read_key(self, elem, keys, defaults):
+        key_id = elem.get('id')
+        name = elem.get('attr.name')
+        attr_type = elem.get('attr.type', 'string')
+        if elem.get('yfiles.type') is not None:
+            name = elem.get('yfiles.type')
+            attr_type = 'yfiles'
+        if name is None:
+            raise Exception("Unknown key for id %s." % key_id)
+
+        # a redefined key id replaces the previous definition
+        keys[key_id] = (name, _graphml_types[attr_type], elem.get('for'))
+        for child in elem:
+            if child.tag.rpartition('}')[2] == 'default':
+                defaults[key_id] = self._convert(child.text, _graphml_types[attr_type])
+
+    @staticmethod
+    def _convert(text, python_type):
+        if python_type is bool:
+            return _graphml_bools[text.lower()]
+        return python_type(text)
+
+    def _decode(self, elem, keys, data):
+        """ Decodes a data element into *data* (yfiles extensions are skipped). """
+        try:
+            name, python_type, _ = keys[elem.get('key')]
+        except KeyError:
+            raise Exception("Bad GraphML data: no key %s" % elem.get('key'))
+
+        if len(elem):
+            return data
+
+        if elem.text is None:
+            data[name] = ''
+        else:
+            data[name] = self._convert(elem.text, python_type)
+
+        return data
 
-            if res not in models:
-                models[res] = model.ResourceModel(res)
+    @staticmethod
+    def _flush_nodes(pending, graphname, add_node):
+        for n, data in pending.items():
+            add_node(n, data, graphname)
+        pending.clear()
 
-            if data['type'] == 'task':
+    @staticmethod
+    def _resource(data, graphname):
+        if 'resource' in data:
+            return data['resource']
+        elif graphname is not None:
+            return graphname
+        else:
+            return 'unknown'
 
-                objects[n] = models[res].add_task(pycpa_model.Task(n))
-                if 'period' in data and data['period'] != 0:
-                    objects[n].in_event_model = pycpa_model.PJdEventModel(
-                            P=util.time_to_time(data['period'], from_time_base, to_time_base),
-                            J=util.time_to_time(data['jitter'], from_time_base, to_time_base))
+    def _add_node(self, n, data, graphname, models, objects, from_time_base, to_time_base, resname=None):
+        res = self._resource(data, graphname)
+        if resname is not None and res != resname:
+            return
 
-                if data['wcet'] != 0:
-                    objects[n].wcet = util.time_to_time(data['wcet'], from_time_base, to_time_base)
+        if res not in models:
+            models[res] = model.ResourceModel(res)
 
-                if data['bcet'] != 0:
-                    objects[n].bcet = util.time_to_time(data['bcet'], from_time_base, to_time_base)
+        if n in objects:
+            pass
+        elif data['type'] == 'task':
+            objects[n] = models[res].add_task(pycpa_model.Task(n))
+        elif data['type'] == 'sched':
+            objects[n] = models[res].add_scheduling_context(model.SchedulingContext(n))
+        elif data['type'] == 'exec':
+            objects[n] = models[res].add_execution_context(model.ExecutionContext(n))
 
-                if 'scheduling_parameter' in data:
-                    objects[n].scheduling_parameter = data['scheduling_parameter']
+        if data['type'] == 'task':
+            if 'period' in data and data['period'] != 0:
+                objects[n].in_event_model = pycpa_model.PJdEventModel(
+                        P=util.time_to_time(data['period'], from_time_base, to_time_base),
+                        J=util.time_to_time(data['jitter'], from_time_base, to_time_base))
 
-                objects[n].resname = res
+            if data['wcet'] != 0:
+                objects[n].wcet = util.time_to_time(data['wcet'], from_time_base, to_time_base)
 
-            elif data['type'] == 'sched':
-                objects[n] = models[res].add_scheduling_context(model.SchedulingContext(n))
+            if data['bcet'] != 0:
+                objects[n].bcet = util.time_to_time(data['bcet'], from_time_base, to_time_base)
 
-                if 'scheduling_parameter' in data:
-                    objects[n].priority = data['scheduling_parameter']
+            if 'scheduling_parameter' in data:
+                objects[n].scheduling_parameter = data['scheduling_parameter']
 
-            elif data['type'] == 'exec':
-                objects[n] = models[res].add_execution_context(model.ExecutionContext(n))
+            objects[n].resname = res
 
-        # iterate edges
-        for source, target, data in g.edges(data=True):
-            if g.nodes[target]['type'] == "task":
-                res = objects[target].resname
-                edgetype = g.nodes[source]['type']
-            else:
-                res = objects[source].resname
-                edgetype = g.nodes[target]['type']
+        elif data['type'] == 'sched':
+            if 'scheduling_parameter' in data:
+                objects[n].priority = data['scheduling_parameter']
 
-            if edgetype == "task":
-                if objects[source].resname == objects[target].resname:
-                    models[res].link_tasks(objects[source], objects[target])
-                else:
-                    objects[source].link_dependent_task(objects[target])
-
-            elif edgetype == "sched":
-                models[res].assign_scheduling_context(objects[source], objects[target])
-            elif edgetype == "exec":
-                if g.nodes[source]['type'] == 'task':
-                    task = objects[source]
-                    ctx = objects[target]
-                    blocking = True
-                else:
-                    task = objects[target]
-                    ctx = objects[source]
-                    blocking = False
+class ModelArchive:
+    """ Single zip file holding many models as GraphML members.
+
+        Members are named like the files of the per-file layout (e.g. model-1.graphml) so that
+        settings refer to either layout. The zip's central directory serves as index, i.e. members
+        are looked up by name without scanning the archive. Opening an existing archive with
+        mode 'a' appends to it.
+    """
+
+    def __init__(self, filename, mode='r', compression=zipfile.ZIP_DEFLATED):
+        self.filename = filename
+        self.zip = zipfile.ZipFile(filename, mode, compression=compression)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
 
-                models[res].assign_execution_context(task, ctx, blocking=blocking)
+    def close(self):
+        self.zip.close()
+
+    def __contains__(self, name):
+        return name in self.zip.NameToInfo
+
+    def names(self, suffix='.graphml'):
+        return [n for n in self.zip.namelist() if n.endswith(suffix)]
+
+    def add_model(self, m, name=None, from_time_base=util.us, to_time_base=util.us):
+        """ Adds model m as GraphML member (default name: model-<m.name>.graphml). """
+        if name is None:
+            name = 'model-%s.graphml' % m.name
+
+        buf = io.BytesIO()
+        Graphml.model_to_file(m, buf, from_time_base, to_time_base)
+        self.zip.writestr(name, buf.getvalue())
+
+    def add_dot(self, models, name):
+        buf = io.StringIO()
+        model.ResourceModel.dump_dot(models, buf)
+        self.zip.writestr(name, buf.getvalue())
+
+    def records(self, name):
+        with self.zip.open(name) as f:
+            return Graphml().records_from_file(f)
+
+    def models(self, name, from_time_base=util.us, to_time_base=util.us, resname=None):
+        with self.zip.open(name) as f:
+            return Graphml().models_from_file(f, from_time_base, to_time_base, resname)
+
+    def model(self, name, resname=None, from_time_base=util.us, to_time_base=util.us):
+        return Graphml._select(self.models(name, from_time_base, to_time_base, resname), resname)
+
+
+class Jsonl:
+    """ Compact model serialization as flat records with integer ids.
+
+        Files are written as JSON lines or, if the file name ends with '.msgpack', as a msgpack
+        stream. Every record is a list starting with a type tag:
+
+        ======================================================  ========================================
+        ``['taskchain', version]``                              header
+        ``['m', name]``                                         start of a resource model
+        ``['t', id, name, wcet, bcet, P, J, sched_param]``      task (P and J are None w/o PJd event model)
+        ``['e', id, name]``                                     execution context
+        ``['s', id, name, priority]``                           scheduling context
+        ``['l', src, dst]``                                     task link
+        ``['a', task, ctx, blocking]``                          allocation
+        ``['p', task, sched]``                                  mapping
+        ``['d', src, dst]``                                     link between tasks of different models
+        ======================================================  ========================================
+    """
+
+    VERSION = 1
+
+    @staticmethod
+    def _binary(filename):
+        if not filename.endswith('.msgpack'):
+            return False
+
+        if msgpack is None:
+            raise Exception("msgpack is required for writing/reading %s" % filename)
+
+        return True
+
+    @staticmethod
+    def model_to_file(m: model.ResourceModel, filename, from_time_base=util.us, to_time_base=util.us):
+        Jsonl.models_to_file([m], filename, from_time_base, to_time_base)
+
+    @staticmethod
+    def models_to_file(models, filename, from_time_base=util.us, to_time_base=util.us):
+        convert = lambda t: util.time_to_time(t, from_time_base, to_time_base)
+
+        records = [['taskchain', Jsonl.VERSION]]
+        ids = dict()
+        for m in models:
+            records.append(['m', m.name])
+            for t in m.tasks:
+                ids[t] = len(ids)
+                P = J = None
+                if isinstance(t.in_event_model, pycpa_model.PJdEventModel):
+                    P = convert(t.in_event_model.P)
+                    J = convert(t.in_event_model.J)
+                records.append(['t', ids[t], t.name, convert(t.wcet), convert(t.bcet), P, J,
+                                getattr(t, 'scheduling_parameter', None)])
+
+            for e in m.exec_ctxs:
+                ids[e] = len(ids)
+                records.append(['e', ids[e], e.name])
+
+            for c in m.sched_ctxs:
+                ids[c] = len(ids)
+                records.append(['s', ids[c], c.name, c.priority])
+
+            # allocations precede links so that links are classified only once when reading
+            for t, data in m.allocations.items():
+                for e, blocking in data.items():
+                    records.append(['a', ids[t], ids[e], blocking])
+
+            for t, c in m.mappings.items():
+                records.append(['p', ids[t], ids[c]])
+
+            for src, dsts in m.tasklinks.items():
+                for dst in dsts:
+                    records.append(['l', ids[src], ids[dst]])
+
+        # links within a model are already covered by its task links (and set up by build_from_model())
+        for m in models:
+            for t in m.tasks:
+                for n in t.next_tasks:
+                    if n in ids and n not in m.tasks:
+                        records.append(['d', ids[t], ids[n]])
+
+        if Jsonl._binary(filename):
+            with open(filename, 'wb') as f:
+                packer = msgpack.Packer()
+                for r in records:
+                    f.write(packer.pack(r))
+        else:
+            with open(filename, 'w') as f:
+                for r in records:
+                    f.write(json.dumps(r, separators=(',', ':')))
+                    f.write('\n')
+
+    @staticmethod
+    def _records(filename):
+        if Jsonl._binary(filename):
+            with open(filename, 'rb') as f:
+                for r in msgpack.Unpacker(f, use_list=True):
+                    yield r
+        else:
+            with open(filename, 'r') as f:
+                for line in f:
+                    yield json.loads(line)
+
+    def model_from_file(self, filename, resname=None, from_time_base=util.us, to_time_base=util.us):
+        return Graphml._select(self.models_from_file(filename, from_time_base, to_time_base), resname)
+
+    def models_from_file(self, filename, from_time_base=util.us, to_time_base=util.us):
+        convert = lambda t: util.time_to_time(t, from_time_base, to_time_base)
+
+        models = dict()
+        objects = dict()
+        m = None
+
+        records = self._records(filename)
+        header = next(records, None)
+        if header is None or header[0] != 'taskchain' or header[1] != self.VERSION:
+            raise Exception("%s is not a taskchain model file (version %d)" % (filename, self.VERSION))
+
+        for r in records:
+            kind = r[0]
+            if kind == 'l':
+                m.link_tasks(objects[r[1]], objects[r[2]])
+            elif kind == 'a':
+                m.assign_execution_context(objects[r[1]], objects[r[2]], blocking=r[3])
+            elif kind == 'p':
+                m.assign_scheduling_context(objects[r[1]], objects[r[2]])
+            elif kind == 't':
+                _, i, name, wcet, bcet, P, J, sched_param = r
+                t = objects[i] = m.add_task(pycpa_model.Task(name))
+                if P is not None and P != 0:
+                    t.in_event_model = pycpa_model.PJdEventModel(P=convert(P), J=convert(J))
+                if wcet != 0:
+                    t.wcet = convert(wcet)
+                if bcet != 0:
+                    t.bcet = convert(bcet)
+                if sched_param is not None:
+                    t.scheduling_parameter = sched_param
+                t.resname = m.name
+            elif kind == 'e':
+                objects[r[1]] = m.add_execution_context(model.ExecutionContext(r[2]))
+            elif kind == 's':
+                objects[r[1]] = m.add_scheduling_context(model.SchedulingContext(r[2]))
+                objects[r[1]].priority = r[3]
+            elif kind == 'd':
+                objects[r[1]].link_dependent_task(objects[r[2]])
+            elif kind == 'm':
+                m = models[r[1]] = model.ResourceModel(r[1])
+            else:
+                raise Exception("Unknown record type %s in %s" % (kind, filename))
 
         return models
 
+
+# archives opened by loader processes (by pid, as forked workers must not share file offsets)
+_archives = dict()
+
+def _records_from_file(filename, cache, archive=None):
+    # process pool entry point (must be picklable)
+    if archive is None:
+        return Graphml(cache=cache).records_from_file(filename)
+
+    key = (os.getpid(), archive)
+    if key not in _archives:
+        _archives[key] = ModelArchive(archive)
+
+    return _archives[key].records(filename)
+
 # vim: tabstop=4 expandtab shiftwidth=4 softtabstop=4
@@ -0,0 +1,302 @@
+"""
+| Copyright (C) 2020 Johannes Schlatow
+| TU Braunschweig, Germany
+| All rights reserved.
+| See LICENSE file for copyright and license details.
+
+:Authors:
+         - Johannes Schlatow
+
+Description
+-----------
+
+Buffered sinks for tabular experiment results.
+"""
+
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+from __future__ import division
+
+import os
+import csv
+import json
+import time
+import glob
+import logging
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+logger = logging.getLogger(__name__)
+
+def is_parquet(filename):
+    return filename.endswith('.parquet')
+
+def checkpoint_file(filename):
+    return filename.rstrip('/') + '.ckpt'
+
+class ResultSink (object):
+    """ Collects result rows and writes them in batches.
+
+        Rows are written once *batch* rows are pending or *interval* seconds have passed since the
+        last flush. After every flush, a checkpoint file (<filename>.ckpt) records what safely reached
+        the disk. When resuming, everything written after the last checkpoint (e.g. a batch that was
+        interrupted by a crash) is discarded.
+
+        Filenames ending in '.parquet' are written as a directory of Parquet files (one per flush,
+        requires pyarrow); everything else as tab-separated CSV. The Parquet schema is fixed by the
+        first flush: columns not given in *types* (field name -> pyarrow type) take the type of their
+        first values, mixed or missing values are stored as strings.
+    """
+
+    def __init__(self, filename, fieldnames, resume=False, batch=1000, interval=10.0, types=None):
+        self.filename   = filename
+        self.fieldnames = list(fieldnames)
+        self.batch      = batch
+        self.interval   = interval
+        self.pending    = list()
+        self.committed  = 0           # number of rows covered by the last checkpoint
+        self.last_flush = time.time()
+
+        if is_parquet(filename):
+            self.backend = _ParquetBackend(filename, self.fieldnames, types)
+        else:
+            self.backend = _CsvBackend(filename, self.fieldnames)
+
+        if resume and os.path.exists(filename):
+            state = self._read_checkpoint()
+            if state is not None:
+                self.committed = state['rows']
+            dropped = self.backend.resume(state)
+            if dropped:
+                logger.warning("Discarded rows %d to %d of %s, which were written after the last checkpoint." %
+                               (self.committed + 1, self.committed + dropped, self.filename))
+        else:
+            self.backend.create()
+            self._write_checkpoint()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def write(self, row):
+        """ Adds a row given as a sequence (in the order of fieldnames) or as a dict. """
+        if isinstance(row, dict):
+            if not set(row.keys()) <= set(self.fieldnames):
+                raise ValueError("dict contains fields not in fieldnames: %s" %
+                        ", ".join([str(k) for k in row.keys() if k not in self.fieldnames]))
+            row = [row.get(f) for f in self.fieldnames]
+        else:
+            assert len(row) == len(self.fieldnames)
+
+        self.pending.append(list(row))
+        if len(self.pending) >= self.batch or time.time() - self.last_flush >= self.interval:
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            state = self.backend.write(self.pending)
+            self.committed += len(self.pending)
+            self.pending = list()
+            self._write_checkpoint(state)
+
+        self.last_flush = time.time()
+
+    def close(self):
+        self.flush()
+        self.backend.close()
+
+    def _read_checkpoint(self):
+        try:
+            with open(checkpoint_file(self.filename), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            logger.warning("No valid checkpoint for %s, resuming without truncation." % self.filename)
+            return None
+
+    def _write_checkpoint(self, state=None):
+        if state is None:
+            state = self.backend.state()
+        state['rows'] = self.committed
+
+        ckptfile = checkpoint_file(self.filename)
+        with open(ckptfile + '.tmp', 'w') as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(ckptfile + '.tmp', ckptfile)
+
+
+class _CsvBackend (object):
+    def __init__(self, filename, fieldnames):
+        self.filename   = filename
+        self.fieldnames = fieldnames
+        self.csvfile    = None
+
+    def create(self):
+        self.csvfile = open(self.filename, 'w')
+        self.writer  = csv.writer(self.csvfile, delimiter='\t')
+        self.writer.writerow(self.fieldnames)
+        self.csvfile.flush()
+
+    def resume(self, state):
+        # assert that headers are present and in correct order
+        with open(self.filename, 'r') as csvfile:
+            reader = csv.reader(csvfile, delimiter='\t')
+            assert next(reader) == self.fieldnames
+
+        # discard anything written after the last checkpoint
+        dropped = 0
+        if state is not None:
+            with open(self.filename, 'r+') as csvfile:
+                csvfile.seek(state['offset'])
+                dropped = sum(1 for row in csv.reader(csvfile, delimiter='\t'))
+                csvfile.truncate(state['offset'])
+
+        self.csvfile = open(self.filename, 'a')
+        self.writer  = csv.writer(self.csvfile, delimiter='\t')
+
+        return dropped
+
+    def state(self):
+        return { 'offset' : self.csvfile.tell() }
+
+    def write(self, rows):
+        self.writer.writerows(rows)
+        self.csvfile.flush()
+        os.fsync(self.csvfile.fileno())
+        return self.state()
+
+    def close(self):
+        self.csvfile.close()
+
+
+class _ParquetBackend (object):
+    def __init__(self, filename, fieldnames, types=None):
+        if pyarrow is None:
+            raise Exception("pyarrow is required for writing %s" % filename)
+
+        self.filename   = filename
+        self.fieldnames = fieldnames
+        self.types      = types or dict()
+        self.schema     = None # fixed by the first part
+        self.parts      = 0
+
+    def _part(self, i):
+        return '%s/part-%06d.parquet' % (self.filename, i)
+
+    def create(self):
+        if not os.path.isdir(self.filename):
+            os.makedirs(self.filename)
+
+        for part in glob.glob('%s/part-*.parquet*' % self.filename):
+            os.remove(part)
+
+    def resume(self, state):
+        # parts that were not completely written
+        for part in glob.glob('%s/part-*.parquet.tmp' % self.filename):
+            os.remove(part)
+
+        parts = sorted(glob.glob('%s/part-*.parquet' % self.filename))
+        dropped = 0
+        if state is not None:
+            self.parts = state['parts']
+            # discard parts written after the last checkpoint
+            for part in parts[self.parts:]:
+                dropped += pyarrow.parquet.read_metadata(part).num_rows
+                os.remove(part)
+        else:
+            self.parts = len(parts)
+
+        if self.parts > 0:
+            self.schema = pyarrow.parquet.read_schema(self._part(0))
+
+        return dropped
+
+    def state(self):
+        return { 'parts' : self.parts }
+
+    def _schema(self, columns):
+        fields = list()
+        for name, values in zip(self.fieldnames, columns):
+            if name in self.types:
+                fields.append(pyarrow.field(name, self.types[name]))
+                continue
+
+            try:
+                t = pyarrow.array(values).type
+            except (pyarrow.ArrowInvalid, pyarrow.ArrowTypeError):
+                # mixed types (e.g. numbers and error states) are stored as strings
+                t = pyarrow.string()
+
+            if pyarrow.types.is_null(t):
+                t = pyarrow.string()
+
+            fields.append(pyarrow.field(name, t))
+
+        return pyarrow.schema(fields)
+
+    @staticmethod
+    def _column(values, field):
+        if pyarrow.types.is_string(field.type):
+            return pyarrow.array([None if v is None else str(v) for v in values], type=field.type)
+
+        try:
+            return pyarrow.array(values, type=field.type)
+        except (pyarrow.ArrowInvalid, pyarrow.ArrowTypeError) as e:
+            raise ValueError("Values of column %s do not match its type %s (declare the type in ResultSink): %s" %
+                             (field.name, field.type, e))
+
+    def write(self, rows):
+        columns = [list(c) for c in zip(*rows)]
+        if self.schema is None:
+            self.schema = self._schema(columns)
+
+        table = pyarrow.Table.from_arrays([self._column(c, f) for c, f in zip(columns, self.schema)],
+                                          schema=self.schema)
+
+        # write part atomically
+        part = self._part(self.parts)
+        pyarrow.parquet.write_table(table, part + '.tmp')
+        os.replace(part + '.tmp', part)
+
+        self.parts += 1
+        return self.state()
+
+    def close(self):
+        pass
+
+
+def read_rows(filename):
+    """ Iterates over the rows (as dicts) of a result file written by ResultSink. """
+    if is_parquet(filename):
+        for part in sorted(glob.glob('%s/part-*.parquet' % filename)):
+            for row in pyarrow.parquet.read_table(part).to_pylist():
+                yield row
+    else:
+        with open(filename, 'r') as csvfile:
+            for row in csv.DictReader(csvfile, delimiter='\t'):
+                yield row
+
+def read_frame(filename, **kwargs):
+    """ Reads a result file written by ResultSink into a pandas DataFrame.
+
+        Additional keyword arguments are passed to pandas.read_csv for CSV files.
+    """
+    import pandas as pd
+
+    if is_parquet(filename):
+        parts = sorted(glob.glob('%s/part-*.parquet' % filename))
+        if not parts:
+            return pd.DataFrame()
+        return pd.concat([pd.read_parquet(p) for p in parts], ignore_index=True)
+
+    return pd.read_csv(filename, sep='\t', **kwargs)
+
+# vim: tabstop=4 expandtab shiftwidth=4 softtabstop=4
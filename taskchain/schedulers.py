@@ -22,6 +22,8 @@ import math
 import logging
 import time
 
+import numpy as np
+
 from pycpa import analysis
 from pycpa import options
 from pycpa import model
@@ -36,6 +38,174 @@ prio_low_wins_equal_fifo = lambda a, b : a <= b
 prio_high_wins_equal_domination = lambda a, b : a > b
 prio_low_wins_equal_domination = lambda a, b : a < b
 
+class InterferenceKernel(object):
+    """ Evaluates eta_plus(w) and the workload sum(wcet * eta_plus(w)) for a fixed set of interferers.
+
+        If all event models are PJd event models, their parameters are packed into arrays once so that
+        eta_plus is evaluated for all interferers in closed form with numpy. Otherwise, eta_plus() of
+        every event model is called.
+    """
+
+    def __init__(self, interferers):
+        """ :param interferers: iterable of (wcet, event model) tuples """
+        interferers = list(interferers)
+        self.wcets        = [c for c, em in interferers]
+        self.event_models = [em for c, em in interferers]
+
+        self.vectorized = len(interferers) > 0 and \
+                all([type(em) is model.PJdEventModel and em.P > 0 for em in self.event_models])
+
+        if self.vectorized:
+            self.P    = np.array([em.P    for em in self.event_models], dtype=np.float64)
+            self.J    = np.array([em.J    for em in self.event_models], dtype=np.float64)
+            self.dmin = np.array([em.dmin for em in self.event_models], dtype=np.float64)
+
+            # integer workloads are computed exactly
+            self.integral = all([isinstance(c, int) for c in self.wcets])
+            self.wcet = np.array(self.wcets, dtype=np.int64 if self.integral else np.float64)
+
+    def _delta_min(self, n):
+        return np.maximum((n - 1) * self.dmin, (n - 1) * self.P - self.J)
+
+    def _eta_plus(self, w):
+        """ eta_plus(w) = max { n | delta_min(n) < w } for all PJd event models """
+        n = np.ceil((w + self.J) / self.P)
+        with np.errstate(divide='ignore'):
+            n = np.where(self.dmin > 0, np.minimum(n, np.ceil(w / self.dmin)), n)
+        n = np.maximum(n, 1)
+
+        # correct rounding errors of the closed form
+        n = np.where((n > 1) & (self._delta_min(n) >= w), n - 1, n)
+        n = np.where(self._delta_min(n + 1) < w, n + 1, n)
+
+        return n.astype(np.int64)
+
+    def _generic(self, w):
+        return not self.vectorized or math.isinf(w) or w <= 0
+
+    def eta_plus(self, w):
+        """ Returns a list with eta_plus(w) of every interferer. """
+        if self._generic(w):
+            return [em.eta_plus(w) for em in self.event_models]
+
+        return self._eta_plus(w).tolist()
+
+    def workload(self, w):
+        """ Returns sum(wcet * eta_plus(w)) over all interferers. """
+        if self._generic(w):
+            s = 0
+            for c, em in zip(self.wcets, self.event_models):
+                s += c * em.eta_plus(w)
+            return s
+
+        s = np.dot(self._eta_plus(w), self.wcet)
+        return int(s) if self.integral else float(s)
+
+class BusyWindowWarmStart(object):
+    """ Provides start values for the fixed-point iteration of b_plus(q).
+
+        As b_plus is monotone in q, b_plus(q-1) plus the workload that is at least added by the q-th
+        activation is a lower bound on b_plus(q). The busy windows are kept across pycpa's global
+        iterations as long as the priorities and WCETs of the chain and its interferers do not change
+        and their input event models only grow (see _grows()).
+
+        Must be invalidated whenever the task chains bound to the resource change.
+    """
+
+    def __init__(self):
+        self.busy_windows = dict() # taskchain -> {q : b_plus(q)}
+        self.parameters   = dict() # taskchain -> (task, priority, wcet, input event model) of the chain and its interferers
+
+    def invalidate(self, taskchain=None):
+        if taskchain is None:
+            self.busy_windows.clear()
+            self.parameters.clear()
+        else:
+            self.busy_windows.pop(taskchain, None)
+            self.parameters.pop(taskchain, None)
+
+    @staticmethod
+    def _grows(old, new):
+        """ returns True if new.eta_plus(w) >= old.eta_plus(w) is known to hold for any w """
+        if new is old:
+            return True
+
+        if type(new) is model.PJdEventModel and type(old) is model.PJdEventModel:
+            if new.P != old.P or new.J < old.J:
+                return False
+            return new.dmin <= old.dmin if old.dmin > 0 else new.dmin == 0
+
+        return False
+
+    def _parameters_grew(self, taskchain, parameters):
+        old = self.parameters.get(taskchain)
+        if old is None or len(old) != len(parameters):
+            return False
+
+        for (t_old, prio_old, wcet_old, em_old), (t, prio, wcet, em) in zip(old, parameters):
+            if t_old is not t or prio_old != prio or wcet_old != wcet:
+                return False
+            if not self._grows(em_old, em):
+                return False
+
+        return True
+
+    def lower_bound(self, taskchain, q, dependencies, delta=0):
+        """ returns a lower bound on b_plus(q) of the task chain (0 if unknown)
+
+            :param dependencies: callable returning the (task, input event model) pairs of the chain and its
+                                 interferers in a stable order (None if only priority and WCET of the task matter);
+                                 only evaluated for q=1, i.e. once per local analysis
+            :param delta: lower bound on b_plus(q) - b_plus(q-1)
+        """
+        # pycpa starts every local analysis with q=1, the parameters do not change until the next one
+        if q == 1 or taskchain not in self.busy_windows:
+            parameters = [(t, t.scheduling_parameter, t.wcet, em) for t, em in dependencies()]
+            if not self._parameters_grew(taskchain, parameters):
+                self.busy_windows[taskchain] = dict()
+            self.parameters[taskchain] = parameters
+
+        busy_windows = self.busy_windows[taskchain]
+        w = busy_windows.get(q, 0)
+        if q-1 in busy_windows:
+            w = max(w, busy_windows[q-1] + delta)
+
+        return w
+
+    def store(self, taskchain, q, w):
+        """ stores b_plus(q), must be preceded by lower_bound() for the same q """
+        self.busy_windows[taskchain][q] = w
+
+class WorkloadTerm(object):
+    """ Workload n*wcet of a task as recorded in the details of b_plus().
+
+        The term is only formatted (as 'n*wcet=workload') when it is printed, e.g. by b_wcrt_str().
+    """
+    __slots__ = ('n', 'wcet')
+
+    def __init__(self, n, wcet):
+        self.n    = n
+        self.wcet = wcet
+
+    @property
+    def workload(self):
+        return self.n * self.wcet
+
+    def __str__(self):
+        return '%s*%s=%s' % (self.n, self.wcet, self.workload)
+
+    def __repr__(self):
+        return str(self)
+
+class TaskList(list):
+    """ List of tasks as recorded in the details of b_plus(), printed as '[name,name,...]'. """
+
+    def __str__(self):
+        return '[%s]' % ','.join([t.name for t in self])
+
+    def __repr__(self):
+        return str(self)
+
 class SPPSchedulerSimple(analysis.Scheduler):
     """ Improved Static-Priority-Preemptive Scheduler for task chains
 
@@ -56,6 +226,32 @@ class SPPSchedulerSimple(analysis.Scheduler):
 
         self._build_sets = build_sets
 
+        # sets [I,D,H] per task chain (see _get_sets())
+        self._sets = dict()
+
+        self.warm_start = BusyWindowWarmStart()
+
+    def invalidate(self, taskchain=None):
+        """ Discards the cached sets and busy windows of the given task chain (or of all task chains).
+
+            Called by TaskchainResource and ResourceModel whenever the bound task chains or priorities change.
+        """
+        if taskchain is None:
+            self._sets.clear()
+        else:
+            self._sets.pop(taskchain, None)
+
+        self.warm_start.invalidate(taskchain)
+
+    def _get_sets(self, taskchain):
+        """ Returns the sets [I,D,H] of the task chain, which are only rebuilt after invalidate(). """
+        sets = self._sets.get(taskchain)
+        if sets is None:
+            sets = self._build_sets(taskchain)
+            self._sets[taskchain] = sets
+
+        return sets
+
     def _get_min_chain_prio(self, taskchain):
         min_prio = taskchain.tasks[0].scheduling_parameter
         for t in taskchain.tasks:
@@ -71,21 +267,25 @@ class SPPSchedulerSimple(analysis.Scheduler):
 
         return q * wcet
 
-    def _compute_interference(self, taskchain, I, w):
-        s = 0
-        for t in I:
-            for tc in taskchain.tasks[0].resource.chains:
-                if t in tc.tasks:
-                    n = tc.tasks[0].in_event_model.eta_plus(w)
-                    s += t.wcet * n
+    def _interference_kernel(self, taskchain, I):
+        """ Returns an InterferenceKernel for the tasks in I (activated by their chains' input event models) """
+        task_chains = taskchain.tasks[0].resource.task_chains
+        return InterferenceKernel([(t.wcet, tc.tasks[0].in_event_model) for t in I for tc in task_chains[t]])
 
-        return s
+    def _dependencies(self, taskchain, I, D):
+        """ Returns the (task, input event model) pairs that b_plus() depends on (see BusyWindowWarmStart) """
+        task_chains = taskchain.tasks[0].resource.task_chains
+        return [(t, taskchain.tasks[0].in_event_model) for t in taskchain.tasks] + \
+               [(t, tc.tasks[0].in_event_model) for t in I for tc in task_chains[t]] + \
+               [(t, None) for t in D]
+
+    def _compute_interference(self, kernel, w):
+        return kernel.workload(w)
 
     def _compute_self_interference(self, taskchain, H, w, q):
         s = 0
+        n = max(taskchain.tasks[0].in_event_model.eta_plus(w)-q, 0) if H else 0
         for t in H:
-            n = taskchain.tasks[0].in_event_model.eta_plus(w)
-            n = max(n-q, 0)
             s += t.wcet * n
 
         return s
@@ -113,12 +313,20 @@ class SPPSchedulerSimple(analysis.Scheduler):
 
         taskchain = task.chain
 
-        w = self._compute_cet(taskchain, q)
+        # sets only depend on priorities and chains, hence they are not rebuilt in every iteration
+        [I,D,H] = self._get_sets(taskchain)
+
+        # the event models may change between invocations, hence the kernel is only reused within the loop
+        kernel = self._interference_kernel(taskchain, I)
+
+        # every activation adds at least the WCET of the chain minus the self-interference it saves
+        delta = self._compute_cet(taskchain, 1) - self._compute_deferred_load(H)
+        dependencies = lambda: self._dependencies(taskchain, I, D)
+        w = max(self._compute_cet(taskchain, q), self.warm_start.lower_bound(taskchain, q, dependencies, delta))
 
         while True:
-            [I,D,H] = self._build_sets(taskchain)
             w_new = self._compute_cet(taskchain, q) + \
-                    self._compute_interference(taskchain, I, w) + \
+                    self._compute_interference(kernel, w) + \
                     self._compute_self_interference(taskchain, H, w, q) + \
                     self._compute_deferred_load(D)
 
@@ -126,20 +334,18 @@ class SPPSchedulerSimple(analysis.Scheduler):
                 assert(w >= q * task.wcet)
                 if details is not None:
                     for t in taskchain.tasks:
-                        details[str(t)+':q*WCET'] = str(q) + '*' + str(t.wcet) + '=' + str(q * t.wcet)
+                        details[str(t)+':q*WCET'] = WorkloadTerm(q, t.wcet)
 
+                    eta = taskchain.tasks[0].in_event_model.eta_plus(w)
                     for t in I:
-                        details[str(t)+":eta*WCET"]    = str(taskchain.tasks[0].in_event_model.eta_plus(w)) \
-                                                          + "*" + str(t.wcet) + "=" \
-                                                          + str(taskchain.tasks[0].in_event_model.eta_plus(w) * t.wcet)
+                        details[str(t)+":eta*WCET"]    = WorkloadTerm(eta, t.wcet)
                     for t in H:
-                        details[str(t)+":eta*WCET"]    = str(max(taskchain.tasks[0].in_event_model.eta_plus(w)-q,0)) \
-                                                          + "*" + str(t.wcet) + "=" \
-                                                          + str(max(taskchain.tasks[0].in_event_model.eta_plus(w)-q,0) * t.wcet)
+                        details[str(t)+":eta*WCET"]    = WorkloadTerm(max(eta-q,0), t.wcet)
 
                     for t in D:
-                        details[str(t)+":WCET"]        = str(t.wcet)
+                        details[str(t)+":WCET"]        = t.wcet
 
+                self.warm_start.store(taskchain, q, w)
                 return w
 
             w = w_new
@@ -601,11 +807,13 @@ class TaskChainBusyWindow(object):
             if elapsed > options.get_opt('timeout'):
                 raise analysis.TimeoutException("Timed out in TaskChainBusyWindow._refresh()")
 
-    def calculate(self):
+    def calculate(self, w_min=0):
+        """ :param w_min: lower bound on the busy window (e.g. from BusyWindowWarmStart) """
         w = 0
         for b in self.lower_bounds.values():
             assert(b.workload() != float('inf'))
             w += b.workload()
+        w = max(w, w_min)
 
         start = time.process_time()
         while True:
@@ -757,6 +965,22 @@ class SPPScheduler(analysis.Scheduler):
         self.candidates = None
         self.independent_tasks = set()
 
+        self.warm_start = BusyWindowWarmStart()
+
+    def invalidate(self, taskchain=None):
+        """ Discards the busy windows of the given task chain (or of all task chains).
+
+            Called by TaskchainResource and ResourceModel whenever the bound task chains or priorities change.
+        """
+        self.warm_start.invalidate(taskchain)
+
+    def _dependencies(self, taskchain):
+        """ Returns the (task, input event model) pairs that b_plus() depends on (see BusyWindowWarmStart) """
+        # every task on the resource is an interferer, the bounds are derived from the chains' input event models
+        resource = taskchain.resource()
+        return [(t, None) for t in resource.model.tasks] + \
+               [(c.tasks[0], c.tasks[0].in_event_model) for c in resource.chains]
+
     def _create_busywindow(self, taskchain, q):
         bw = TaskChainBusyWindow(taskchain, q)
 
@@ -850,8 +1074,10 @@ class SPPScheduler(analysis.Scheduler):
 
         # build set of own execution contexts
         tc_contexts = set()
+        tc_contexts_mask = 0
         for t in taskchain.tasks:
             tc_contexts.update(resource.model.allocations[t].keys())
+            tc_contexts_mask |= resource.model.allocation_mask(t)
 
         # build set of higher priority tasks
         hp_tasks = set()
@@ -887,23 +1113,23 @@ class SPPScheduler(analysis.Scheduler):
             for t in lp_tasks - possible_lp_blockers:
                 if t not in taskchain.tasks:
 
-                    blocking = False
-                    for e in tc_contexts:
-                        if e in resource.model.allocations[t]:
-                            blocking = True
-                            break
+                    t_bit    = 1 << resource.model.task_ids[t]
+                    t_allocs = resource.model.allocation_mask(t)
+
+                    blocking = (t_allocs & tc_contexts_mask) != 0
 
                     if not blocking:
                         for hp in hp_tasks:
-                            if t not in resource.model.predecessors(hp, recursive=True) and t not in resource.model.successors(hp, recursive=True):
-                                if len(set(resource.model.allocations[t].keys()) & set(resource.model.allocations[hp].keys())) > 0:
+                            if not t_bit & (resource.model.predecessor_mask(hp) | resource.model.successor_mask(hp)):
+                                if t_allocs & resource.model.allocation_mask(hp):
                                     blocking = True
                                     break
 
                     if not blocking:
                         for lp in possible_lp_blockers:
-                            if t not in resource.model.predecessors(lp, only_strong=True, recursive=True) and t not in resource.model.successors(lp, only_strong=True, recursive=True):
-                                if len(set(resource.model.allocations[t].keys()) & set(resource.model.allocations[lp].keys())) > 0:
+                            if not t_bit & (resource.model.predecessor_mask(lp, only_strong=True) | \
+                                            resource.model.successor_mask(lp, only_strong=True)):
+                                if t_allocs & resource.model.allocation_mask(lp):
                                     blocking = True
                                     break
 
@@ -1014,15 +1240,19 @@ class SPPScheduler(analysis.Scheduler):
         self._build_bounds(bw, q)
 
         if self.candidates is not None:
+            # no warm start as every candidate has its own fixed point
             w = self.candidates.search()
         else:
-            w = bw.calculate()
+            dependencies = lambda: self._dependencies(taskchain)
+            w = bw.calculate(w_min=self.warm_start.lower_bound(taskchain, q, dependencies))
+            self.warm_start.store(taskchain, q, w)
 
         if details is not None:
+            # bounds are only printed on demand as a new bound tree is built on every call
             for t, wlb in self.task_wl_bounds.items():
-                details[str(t)] = str(wlb)
+                details[str(t)] = wlb
 
-            details['dependencies'] = "[%s]" % ','.join([t.name for t in taskchain.resource().model.tasks - self.independent_tasks])
+            details['dependencies'] = TaskList(taskchain.resource().model.tasks - self.independent_tasks)
 
         return w
 
@@ -1049,6 +1279,24 @@ class SPPSchedulerSegmentsBase(analysis.Scheduler):
         self.priority_cmp = priority_cmp
         self._build_sets = build_sets
 
+        self._chains_with_sets = set() # task chains that store their sets (_T, _I, _D, _B)
+
+        self.warm_start = BusyWindowWarmStart()
+
+    def invalidate(self, taskchain=None):
+        """ Discards the sets and busy windows of the given task chain (or of all task chains).
+
+            Called by TaskchainResource and ResourceModel whenever the bound task chains or priorities change.
+        """
+        chains = list(self._chains_with_sets) if taskchain is None else [taskchain]
+        for tc in chains:
+            for attr in ('_T', '_I', '_D', '_B'):
+                if hasattr(tc, attr):
+                    delattr(tc, attr)
+            self._chains_with_sets.discard(tc)
+
+        self.warm_start.invalidate(taskchain)
+
     @staticmethod
     def accept_model(chains, m):
         for c in chains:
@@ -1079,31 +1327,42 @@ class SPPSchedulerSegmentsBase(analysis.Scheduler):
     def _potential_blockers(self, A, B, model):
         """ implements Def. 4.3.41 """
 
-        blockers = set()
-        cur_len = -1
-        while cur_len < len(blockers):
-            cur_len = len(blockers)
+        # set operations are performed on the model's task bitsets
+        B_mask = model.task_mask(B)
+        blockers = 0
+        cur = -1
+        while cur != blockers:
+            cur = blockers
 
             for tj in model.tasks - A:
-                for ti in (B | blockers) - model.predecessors(tj, recursive=True, only_strong=True) \
-                                           - model.successors(tj, recursive=True, only_strong=True):
-                    if ti is not tj and model.allocations[ti].keys() & model.allocations[tj].keys():
-                        blockers.add(tj)
+                j = 1 << model.task_ids[tj]
+                if blockers & j:
+                    continue
+
+                candidates = (B_mask | blockers) & ~j \
+                             & ~model.predecessor_mask(tj, only_strong=True) \
+                             & ~model.successor_mask(tj, only_strong=True)
+
+                # any candidate that shares an execution context with tj?
+                if candidates & model.sharing_mask(tj):
+                    blockers |= j
 
-        return blockers
+        return model.mask_tasks(blockers)
 
     def _prio_sets(self, taskchain, min_prio):
+        chain_tasks = set(taskchain.tasks)
+
         higher = set()
-        for t in taskchain.resource().tasks - set(taskchain.tasks):
+        for t in taskchain.resource().tasks - chain_tasks:
             if self.priority_cmp(t.scheduling_parameter, min_prio):
                 higher.add(t)
 
-        blockers = self._potential_blockers(higher | set(taskchain.tasks),
-                                            higher | set(taskchain.tasks),
+        blockers = self._potential_blockers(higher | chain_tasks,
+                                            higher | chain_tasks,
                                             taskchain.resource().model)
 
         medium = set()
-        for tj in taskchain.resource().tasks - set(taskchain.tasks):
+        for tj in taskchain.resource().tasks - chain_tasks:
             for ti in blockers:
                 if self.priority_cmp(tj.scheduling_parameter, ti.scheduling_parameter):
                     medium.add(tj)
@@ -1196,22 +1455,28 @@ class SPPSchedulerSegmentsBase(analysis.Scheduler):
 
         return q * wcet
 
-    def _compute_interference(self, taskset, w):
-        """ computes independent-interference part in Def. 4.3.17 """
-        s = 0
-        for t in taskset:
-            # tasks can be in multiple chains but the decomposition enforces that
-            #   there is only a single input event model for every task
-            #   the unmodified input event models are propagated across the chain (cf. bind_taskchain())
-            s += t.wcet * t.in_event_model.eta_plus(w)
+    def _interference_kernel(self, taskset):
+        """ returns an InterferenceKernel for the tasks in taskset """
+        # tasks can be in multiple chains but the decomposition enforces that
+        #   there is only a single input event model for every task
+        #   the unmodified input event models are propagated across the chain (cf. bind_taskchain())
+        return InterferenceKernel([(t.wcet, t.in_event_model) for t in taskset])
 
-        return s
+    def _dependencies(self, taskchain):
+        """ Returns the (task, input event model) pairs that b_plus() depends on (see BusyWindowWarmStart) """
+        return [(t, None) for t in taskchain.tasks] + \
+               [(t, t.in_event_model) for t in itertools.chain(taskchain._T.keys(), taskchain._I)] + \
+               [(t, None) for t in taskchain._D.keys()]
+
+    def _compute_interference(self, kernel, w):
+        """ computes independent-interference part in Def. 4.3.17 """
+        return kernel.workload(w)
 
-    def _compute_self_interference(self, taskset, q, w):
-        """ computes self-interference part in Def. 4.3.17 """
+    def _compute_self_interference(self, taskset, kernel, q, w):
+        """ computes self-interference part in Def. 4.3.17 (kernel must be built from taskset) """
         s = 0
-        for t, f in taskset.items():
-            s += t.wcet * f(q, t.in_event_model.eta_plus(w))
+        for (t, f), n in zip(taskset.items(), kernel.eta_plus(w)):
+            s += t.wcet * f(q, n)
 
         return s
 
@@ -1244,44 +1509,52 @@ class SPPSchedulerSegmentsBase(analysis.Scheduler):
 
         taskchain = task.chain
 
-        while True:
-            w_new = self._compute_self_interference(taskchain._T, q, w) + \
-                    self._compute_deferred_interference(taskchain._D)
+        # the event models may change between invocations, hence the kernels are only reused within the loop
+        self_kernel = self._interference_kernel(taskchain._T.keys())
 
-            tail_wcet = 0
-            if compute_b_plus and hasattr(taskchain, '_B'):
-                # omit non-preemptible tails
-                w_new += self._compute_interference(taskchain._I-taskchain._B, w)
+        tail_wcet = 0
+        if compute_b_plus and hasattr(taskchain, '_B'):
+            # omit non-preemptible tails
+            I = list(taskchain._I-taskchain._B)
+            B = list(taskchain._B)
 
-                last_strict, tmp = self._last_strict(taskchain)
-                tail_wcet = sum([t.wcet for t in last_strict])
-                w_new += self._compute_interference(taskchain._B, w-tail_wcet)
-            else:
-                w_new += self._compute_interference(taskchain._I, w)
+            last_strict, tmp = self._last_strict(taskchain)
+            tail_wcet = sum([t.wcet for t in last_strict])
+            tail_kernel = self._interference_kernel(B)
+        else:
+            I = list(taskchain._I)
+            B = list()
+            tail_kernel = None
+
+        kernel = self._interference_kernel(I)
+
+        while True:
+            w_new = self._compute_self_interference(taskchain._T, self_kernel, q, w) + \
+                    self._compute_deferred_interference(taskchain._D) + \
+                    self._compute_interference(kernel, w)
+
+            if tail_kernel is not None:
+                w_new += self._compute_interference(tail_kernel, w-tail_wcet)
 
             if w == w_new:
                 if details is not None:
-                    for t, f in taskchain._T.items():
-                        arg = t.in_event_model.eta_plus(w)
-                        details[str(t)+':f(q)*WCET'] = str(f(q,arg)) + '*' + str(t.wcet) + '=' + str(f(q,arg) * t.wcet)
+                    # eta_plus is evaluated once per kernel, the terms are only formatted when printed
+                    for (t, f), n in zip(taskchain._T.items(), self_kernel.eta_plus(w)):
+                        details[str(t)+':f(q)*WCET'] = WorkloadTerm(f(q,n), t.wcet)
 
-                    for t in taskchain._I:
-                        assert(t.in_event_model.eta_plus(w) > 0)
-                        details[str(t)+":eta(w)*WCET"]  = str(t.in_event_model.eta_plus(w)) \
-                                                        + "*" + str(t.wcet) + "=" \
-                                                        + str(t.in_event_model.eta_plus(w) * t.wcet)
+                    for t, n in zip(I, kernel.eta_plus(w)):
+                        assert(n > 0)
+                        details[str(t)+":eta(w)*WCET"]  = WorkloadTerm(n, t.wcet)
 
                     for t, n in taskchain._D.items():
                         if n > 0:
-                            details[str(t)+":n*WCET"]       = str(n) + "*" + str(t.wcet) + "=" + str(n * t.wcet)
+                            details[str(t)+":n*WCET"]       = WorkloadTerm(n, t.wcet)
 
                     # details argument is only provided when called with compute_b_plus=True
-                    if hasattr(taskchain, '_B'):
-                        for t in taskchain._B:
+                    if tail_kernel is not None:
+                        for t, n in zip(B, tail_kernel.eta_plus(w-tail_wcet)):
                             assert t not in taskchain._T
-                            details[str(t)+":eta(w)*WCET"]  = str(t.in_event_model.eta_plus(w-tail_wcet)) \
-                                                            + "*" + str(t.wcet) + "=" \
-                                                            + str(t.in_event_model.eta_plus(w-tail_wcet) * t.wcet)
+                            details[str(t)+":eta(w)*WCET"]  = WorkloadTerm(n, t.wcet)
 
                 return w
 
@@ -1294,16 +1567,20 @@ class SPPSchedulerSegmentsBase(analysis.Scheduler):
 
         taskchain = task.chain
 
-        w = self._compute_cet(taskchain, q)
-
-        # only build the sets once, assuming that the resource's task set never changes
-        #    FIXME if the analysis should ever be re-started after changing the task set,
-        #          the sets must be recomputed
+        # only build the sets once, they are discarded by invalidate() when the task set or priorities change
         if not hasattr(taskchain, '_D'):
             self._build_sets(taskchain)
+            self._chains_with_sets.add(taskchain)
+
+        # every activation adds at least the self-interference that does not depend on eta
+        #   (the functions in _T are either q or max(eta, q), which increases the least for eta >= q)
+        delta = sum([t.wcet * (f(q, q) - f(q-1, q)) for t, f in taskchain._T.items()])
+        dependencies = lambda: self._dependencies(taskchain)
+        w = max(self._compute_cet(taskchain, q), self.warm_start.lower_bound(taskchain, q, dependencies, delta))
 
         w = self.scheduling_horizon(task, q, w=w, details=details, compute_b_plus=True)
 
+        self.warm_start.store(taskchain, q, w)
         return w
 
 class SPPSchedulerSegmentsUniform(SPPSchedulerSegmentsBase):
@@ -1328,9 +1605,10 @@ class SPPSchedulerSegmentsUniform(SPPSchedulerSegmentsBase):
                         return False
 
             # there are no strict precedence relations between different chains
+            #   (links to tasks of other resources are never strict)
             for t in c.tasks:
                 for d in t.next_tasks - set(c.tasks):
-                    if model.is_strong_precedence(t, d):
+                    if d in model.tasks and model.is_strong_precedence(t, d):
                         logger.error("Strict precedence relation between tasks of different chains(%s and %s)." % (t, d))
                         return False
 
@@ -1366,6 +1644,7 @@ class SPPSchedulerSegmentsUniform(SPPSchedulerSegmentsBase):
         taskchain._T = dict()
 
         model = taskchain.resource().model
+        chain_tasks = set(taskchain.tasks)
 
         # compute minimum priority of the chain
         min_prio, min_prio_task = self._get_min_chain_prio(taskchain)
@@ -1431,11 +1710,11 @@ class SPPSchedulerSegmentsUniform(SPPSchedulerSegmentsBase):
                         taskchain._D[t] = 0
 
         # chain tasks do not occur in _I or _D
-        for t in set(taskchain.tasks):
+        for t in chain_tasks:
                 assert t not in taskchain._I and t not in taskchain._D, "Taskchain task %s in D or I." % t
 
         # sanity check (all high priority tasks occur in _I or _D
-        for t in taskchain.resource().tasks - set(taskchain.tasks) - lower:
+        for t in taskchain.resource().tasks - chain_tasks - lower:
             if self.priority_cmp(t.scheduling_parameter, min_prio):
                 assert t in taskchain._I or t in taskchain._D, "Task %s not in D or I." % t
 
@@ -1455,6 +1734,7 @@ class SPPSchedulerSegments(SPPSchedulerSegmentsBase):
         taskchain._T = dict()
 
         model = taskchain.resource().model
+        chain_tasks = set(taskchain.tasks)
 
         # compute minimum priority of the chain
         min_prio, min_prio_task = self._get_min_chain_prio(taskchain)
@@ -1478,7 +1758,7 @@ class SPPSchedulerSegments(SPPSchedulerSegmentsBase):
             # first, determine whether a t_L exists according to Lemma 4.3.36
             tL = None
             non_strict_succ = (model.successors(min_prio_task, recursive=True)
-                             - model.successors(min_prio_task, only_strong=True, recursive=True)) & set(taskchain.tasks)
+                             - model.successors(min_prio_task, only_strong=True, recursive=True)) & chain_tasks
             if not (self._potential_blockers(non_strict_succ, non_strict_succ, model) & \
                     model.predecessors(min_prio_task, only_strong=True, recursive=True)):
                 tL = min_prio_task
@@ -1490,13 +1770,13 @@ class SPPSchedulerSegments(SPPSchedulerSegmentsBase):
             head = set()
             tail = set()
             if last_strict and tL not in last_strict:
-                head = model.predecessors(tS, recursive=True) & set(taskchain.tasks)
+                head = model.predecessors(tS, recursive=True) & chain_tasks
             elif tL:
-                head = model.predecessors(tL, recursive=True) & set(taskchain.tasks)
+                head = model.predecessors(tL, recursive=True) & chain_tasks
             else:
-                head = set(taskchain.tasks)
+                head = chain_tasks
 
-            tail = set(taskchain.tasks) - head
+            tail = chain_tasks - head
 
             # set self-interference
             for t in head:
@@ -1513,22 +1793,22 @@ class SPPSchedulerSegments(SPPSchedulerSegmentsBase):
         for c, segs in other_segs.items():
             for s in segs:
                 if s is crit_seg:
-                    for t in s - set(taskchain.tasks):
+                    for t in s - chain_tasks:
                         taskchain._D[t] = 1
                 else:
-                    for t in s - set(taskchain.tasks):
+                    for t in s - chain_tasks:
                         taskchain._D[t] = 0
 
         # process head segments of purely strict chains
         for c, head in head_segs.items():
             if other_segs[c] and c in strict_chains:
                 # Corollary 4.3.36
-                for t in head - set(taskchain.tasks):
+                for t in head - chain_tasks:
                     taskchain._D[t] = 1
 
         # process tasks in head segments that are not already in _D
         for c, head in head_segs.items():
-            for t in head - set(taskchain.tasks):
+            for t in head - chain_tasks:
                 if t not in taskchain._D:
                     taskchain._I.add(t)
 
@@ -1541,7 +1821,7 @@ class SPPSchedulerSegments(SPPSchedulerSegmentsBase):
                    "T and D&I are not disjoint: %s" % (taskchain._T.keys()&(taskchain._I|taskchain._D.keys()))
 
         # sanity check (all high priority tasks occur in _I or _D
-        for t in taskchain.resource().tasks - set(taskchain.tasks) - lower:
+        for t in taskchain.resource().tasks - chain_tasks - lower:
             if self.priority_cmp(t.scheduling_parameter, min_prio):
                 assert t in taskchain._I or t in taskchain._D, "Task %s not in D or I." % t
 
@@ -1588,6 +1868,7 @@ class SPPSchedulerSegmentsInheritance(SPPSchedulerSegmentsBase):
         taskchain._B = set()
 
         model = taskchain.resource().model
+        chain_tasks = set(taskchain.tasks)
 
         # compute minimum priority of the chain
         min_prio, min_prio_task = self._get_min_chain_prio(taskchain)
@@ -1613,7 +1894,7 @@ class SPPSchedulerSegmentsInheritance(SPPSchedulerSegmentsBase):
         else:
             # first, determine t_L according to Lemma 4.3.55
             tL = None
-            spreds = model.predecessors(min_prio_task, only_strong=True, recursive=True) & set(taskchain.tasks)
+            spreds = model.predecessors(min_prio_task, only_strong=True, recursive=True) & chain_tasks
             if not spreds:
                 tL = min_prio_task
             elif len(spreds) == 1:
@@ -1625,8 +1906,8 @@ class SPPSchedulerSegmentsInheritance(SPPSchedulerSegmentsBase):
                         break
 
             # Def. 4.3.57
-            head = model.predecessors(tL, recursive=True) & set(taskchain.tasks)
-            tail = set(taskchain.tasks) - head
+            head = model.predecessors(tL, recursive=True) & chain_tasks
+            tail = chain_tasks - head
 
             # set self-interference
             for t in head:
@@ -1643,28 +1924,28 @@ class SPPSchedulerSegmentsInheritance(SPPSchedulerSegmentsBase):
         for c, segs in other_segs.items():
             for s in segs:
                 if s is crit_seg:
-                    for t in s - set(taskchain.tasks):
+                    for t in s - chain_tasks:
                         taskchain._D[t] = 1
                 else:
-                    for t in s - set(taskchain.tasks):
+                    for t in s - chain_tasks:
                         taskchain._D[t] = 0
 
         # process head segments of purely strict chains and tasks after the first B segment
         for c, head in head_segs.items():
             if other_segs[c] and c in strict_chains:
                 # Corollary 4.3.36
-                for t in head - set(taskchain.tasks):
+                for t in head - chain_tasks:
                     taskchain._D[t] = 1
             else:
                 after_B = False
-                for t in head - set(taskchain.tasks):
+                for t in head - chain_tasks:
                     if after_B or t in blocker:
                         after_B = True
                         taskchain._D[t] = 1
 
         # process tasks in head segments that are not already in _D
         for c, head in head_segs.items():
-            for t in head - set(taskchain.tasks):
+            for t in head - chain_tasks:
                 if t not in taskchain._D:
                     taskchain._I.add(t)
 
@@ -1677,7 +1958,7 @@ class SPPSchedulerSegmentsInheritance(SPPSchedulerSegmentsBase):
                    "T and D&I are not disjoint: %s" % (taskchain._T.keys()&(taskchain._I|taskchain._D.keys()))
 
         # sanity check (all high priority tasks occur in _I or _D
-        for t in taskchain.resource().tasks - set(taskchain.tasks) - lower:
+        for t in taskchain.resource().tasks - chain_tasks - lower:
             if self.priority_cmp(t.scheduling_parameter, min_prio):
                 assert t in taskchain._I or t in taskchain._D, "Task %s not in D or I." % t
 